@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class AnalyticsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "analytics"
+
+    def ready(self):
+        from django.conf import settings
+        # pay the joblib/sklearn import + model load at boot instead of on the first prediction
+        if getattr(settings, "ANALYTICS_WARMUP", False):
+            from .forecasts import warmup
+            warmup()
+            # likewise the full hourly-table read behind the first columnar request
+            if getattr(settings, "ANALYTICS_COLUMNAR_ENDPOINTS", ()):
+                from .engine import engine
+                engine.preload()
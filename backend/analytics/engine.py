@@ -0,0 +1,188 @@
+"""
+In-process columnar copy of SeoulBikeHourly for the KPI / heatmap / seasonal-weather
+endpoints. The whole hourly table is a few thousand rows per year, so it is held as
+typed numpy columns and queried with boolean masks + bincount instead of SQL.
+
+Loaded on first use (or at startup via preload(), see AnalyticsConfig.ready) and
+reloaded when the table's data version changes.
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import Count, Max, Sum
+from django.utils.dateparse import parse_date
+
+from .models import SeoulBikeHourly
+
+logger = logging.getLogger(__name__)
+
+MEASURES = [
+    "rented_bike_count", "temperature_c", "humidity_pct", "windspeed_ms", "visibility_10m",
+    "dew_point_c", "solar_radiation_mj_m2", "rainfall_mm", "snowfall_cm",
+]
+WEATHER = MEASURES[1:]
+CATEGORICALS = ["seasons", "holiday", "functioning_day"]
+
+# seconds between data-version checks against the DB
+VERSION_CHECK_SECONDS = 5
+
+
+def _day_number(d):
+    return int(np.datetime64(d, "D").astype(np.int32))
+
+
+class HourlyColumns:
+    """Immutable snapshot of the hourly table as typed column arrays."""
+
+    def __init__(self, rows, version=None):
+        cols = list(zip(*rows)) if rows else [()] * (2 + len(MEASURES) + len(CATEGORICALS))
+        self.version = version
+        self.n = len(rows)
+        self.day = np.array(cols[0], dtype="datetime64[D]").astype(np.int32)
+        self.hour = np.array(cols[1], dtype=np.int8)
+        # 1970-01-01 was a Thursday; 0=Sun..6=Sat to match ExtractWeekDay - 1
+        self.weekday = ((self.day + 4) % 7).astype(np.int8)
+        self.measures = {
+            name: np.array(cols[2 + i], dtype=np.float32) for i, name in enumerate(MEASURES)
+        }
+        self.categories = {}
+        self.codes = {}
+        for i, name in enumerate(CATEGORICALS):
+            values = np.array(cols[2 + len(MEASURES) + i], dtype=object)
+            labels, codes = np.unique(values, return_inverse=True)
+            self.categories[name] = {str(label): code for code, label in enumerate(labels)}
+            self.codes[name] = codes.astype(np.int8)
+
+    # -----------------------
+    # Queries
+    # -----------------------
+    def mask(self, start=None, end=None, season=None):
+        """Boolean row mask equivalent to views._apply_filters."""
+        m = np.ones(self.n, dtype=bool)
+        if start:
+            m &= self.day >= _day_number(start)
+        if end:
+            m &= self.day <= _day_number(end)
+        if season:
+            code = self.categories["seasons"].get(season)
+            if code is None:
+                return np.zeros(self.n, dtype=bool)
+            m &= self.codes["seasons"] == code
+        return m
+
+    def mask_from_request(self, request):
+        start = request.GET.get("start")
+        end = request.GET.get("end")
+        return self.mask(
+            start=parse_date(start) if start else None,
+            end=parse_date(end) if end else None,
+            season=request.GET.get("season"),
+        )
+
+    def kpis_basic(self, m):
+        rides = self.measures["rented_bike_count"][m]
+        rows = int(m.sum())
+        if not rows:
+            return {"rows": 0, "total_rides": 0, "avg_temp_c": 0, "avg_humidity_pct": 0, "avg_rides_per_hour": 0}
+        total = float(rides.sum(dtype=np.float64))
+        return {
+            "rows": rows,
+            "total_rides": int(round(total)),
+            "avg_temp_c": round(float(self.measures["temperature_c"][m].mean(dtype=np.float64)), 2),
+            "avg_humidity_pct": round(float(self.measures["humidity_pct"][m].mean(dtype=np.float64)), 2),
+            "avg_rides_per_hour": round(total / rows, 2),
+        }
+
+    def hourly_heatmap(self, m):
+        """7x24 (Sun..Sat x hour) mean rides."""
+        key = self.weekday[m].astype(np.int32) * 24 + self.hour[m]
+        sums = np.bincount(key, weights=self.measures["rented_bike_count"][m], minlength=168)
+        counts = np.bincount(key, minlength=168)
+        avg = np.divide(sums, counts, out=np.zeros(168), where=counts > 0)
+        return np.round(avg, 2).reshape(7, 24).tolist()
+
+    def seasonal_hourly_weather(self, season):
+        """Same shape as forecasts.seasonal_hourly_weather: {hour: {"hour": h, <weather>: mean}}."""
+        m = self.mask(season=season)
+        hours = self.hour[m]
+        counts = np.bincount(hours, minlength=24)
+        means = {
+            name: np.bincount(hours, weights=self.measures[name][m], minlength=24) / np.maximum(counts, 1)
+            for name in WEATHER
+        }
+        return {
+            h: {"hour": h, **{name: float(means[name][h]) for name in WEATHER}}
+            for h in range(24) if counts[h]
+        }
+
+
+class ColumnarEngine:
+    """Holds the current HourlyColumns and swaps in a new one when the data version changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def data_version():
+        # updated_at catches upserts; the ride sum catches raw-SQL station rollups
+        # (stations.rebuild_rollups), which don't touch updated_at
+        v = SeoulBikeHourly.objects.aggregate(
+            n=Count("id"), last_id=Max("id"), last=Max("ingested_at"), updated=Max("updated_at"),
+            rides=Sum("rented_bike_count"),
+        )
+        return (v["n"], v["last_id"], v["last"], v["updated"], v["rides"])
+
+    def refresh(self, force=False):
+        """Return current columns, reloading if the hourly table changed (checked every few seconds)."""
+        cols = self._columns
+        now = time.monotonic()
+        if not force and cols is not None and now - self._checked_at < VERSION_CHECK_SECONDS:
+            return cols
+        with self._lock:
+            version = self.data_version()
+            if force or self._columns is None or self._columns.version != version:
+                rows = list(SeoulBikeHourly.objects.values_list("date", "hour", *MEASURES, *CATEGORICALS))
+                self._columns = HourlyColumns(rows, version)
+            self._checked_at = now
+            return self._columns
+
+    def invalidate(self):
+        with self._lock:
+            self._columns = None
+
+    def preload(self):
+        """
+        Load the columns on a background thread once app loading finishes (querying from
+        AppConfig.ready() itself is discouraged). A columnar request arriving meanwhile
+        waits on the lock for this load instead of starting its own. Returns the thread.
+        """
+        def load():
+            apps.ready_event.wait()
+            try:
+                self.refresh(force=True)
+            except DatabaseError as exc:  # e.g. not migrated yet; the first request loads instead
+                logger.warning("Columnar engine preload failed: %s", exc)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=load, name="analytics-engine-preload", daemon=True)
+        thread.start()
+        return thread
+
+
+engine = ColumnarEngine()
+
+
+def use_columnar(request, endpoint):
+    """?engine=columnar|orm wins; otherwise settings.ANALYTICS_COLUMNAR_ENDPOINTS decides."""
+    choice = request.GET.get("engine")
+    if choice in ("columnar", "orm"):
+        return choice == "columnar"
+    return endpoint in getattr(settings, "ANALYTICS_COLUMNAR_ENDPOINTS", ())
@@ -0,0 +1,190 @@
+"""
+Model store access, inference feature rows and materialized day forecasts.
+
+The dashboard only ever asks predict_day about a handful of flag combinations, so
+`materialize_forecasts` precomputes the next N days x holiday x functioning_day in one
+batch and stores them in ForecastHourly tagged with the model version. predict_day
+serves those rows while the version still matches the promoted model file.
+"""
+import math
+import warnings
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+from django.db import transaction
+from django.db.models import Avg
+
+from . import metrics
+from .models import ForecastHourly, SeoulBikeHourly
+
+MODELS_DIR = Path(__file__).resolve().parents[2] / "models_store"
+MODEL_NAMES = ["model_v2.joblib", "model_v1.joblib"]  # first existing one is served
+
+HOLIDAY_FLAGS = ["No Holiday", "Holiday"]
+FUNCTIONING_FLAGS = ["Yes", "No"]
+SEASON_CODES = {"Winter": 0, "Spring": 1, "Summer": 2, "Autumn": 3}  # as in train_demand_model
+SEASON_BY_MONTH = {
+    12: "Winter", 1: "Winter", 2: "Winter", 3: "Spring", 4: "Spring", 5: "Spring",
+    6: "Summer", 7: "Summer", 8: "Summer", 9: "Autumn", 10: "Autumn", 11: "Autumn",
+}
+WEATHER_FIELDS = [
+    "temperature_c", "humidity_pct", "windspeed_ms", "visibility_10m",
+    "dew_point_c", "solar_radiation_mj_m2", "rainfall_mm", "snowfall_cm",
+]
+
+
+# -----------------------
+# Model store
+# -----------------------
+def active_model_path():
+    for name in MODEL_NAMES:
+        p = MODELS_DIR / name
+        if p.exists():
+            return p
+    return None
+
+
+def model_version(path=None):
+    """Identifies the promoted model file (name, mtime, size); None if there is none."""
+    path = path or active_model_path()
+    if path is None:
+        return None
+    st = Path(path).stat()
+    return f"{Path(path).name}:{st.st_mtime_ns}:{st.st_size}"
+
+
+_model_cache = {"model": None, "version": None}
+def get_model():
+    """Served model, reloaded when a new file is promoted into models_store/."""
+    path = active_model_path()
+    if path is None:
+        raise RuntimeError("No trained model found in models_store/")
+    version = model_version(path)
+    if _model_cache["model"] is None or _model_cache["version"] != version:
+        from joblib import load
+        with metrics.timer("model_load"):
+            _model_cache["model"] = load(path)
+        _model_cache["version"] = version
+    return _model_cache["model"]
+
+
+# -----------------------
+# Features
+# -----------------------
+def seasonal_hourly_weather(season: str):
+    agg = SeoulBikeHourly.objects.filter(seasons=season).values("hour").annotate(
+        **{f: Avg(f) for f in WEATHER_FIELDS}
+    )
+    return {a["hour"]: a for a in agg}
+
+
+def feature_row(hour, weather, weekday, month, seasons, holiday, functioning_day):
+    """
+    One model input row covering both the v2 pipeline's raw inputs and the numeric
+    features train_demand_model fits on. Lag/rolling/delta inputs default to 0.
+    """
+    hour, month = int(hour), int(month)
+    rain = float(weather.get("rainfall_mm", 0.0))
+    snow = float(weather.get("snowfall_cm", 0.0))
+    row = {"hour": hour}
+    row.update({f: float(weather.get(f, 0.0)) for f in WEATHER_FIELDS})
+    row.update({
+        "weekday": int(weekday),
+        "month": month,
+        "seasons": str(seasons),
+        "holiday": str(holiday),
+        "functioning_day": str(functioning_day),
+        "season": SEASON_CODES.get(str(seasons), -1),
+        "is_holiday": 1 if str(holiday).lower() != "no holiday" else 0,
+        "hour_sin": math.sin(2 * math.pi * hour / 24), "hour_cos": math.cos(2 * math.pi * hour / 24),
+        "month_sin": math.sin(2 * math.pi * month / 12), "month_cos": math.cos(2 * math.pi * month / 12),
+        "lag_1": 0.0, "lag_24": 0.0, "roll3_same_hour": 0.0, "roll7_same_hour": 0.0,
+        "delta_temperature_c_24h": 0.0, "delta_humidity_pct_24h": 0.0, "delta_windspeed_ms_24h": 0.0,
+        "delta_visibility_10m_24h": 0.0, "delta_dew_point_c_24h": 0.0, "delta_solar_radiation_mj_m2_24h": 0.0,
+        "delta_rainfall_mm_24h": 0.0, "delta_snowfall_cm_24h": 0.0,
+        "rain_flag": 1 if rain > 0 else 0,
+        "snow_flag": 1 if snow > 0 else 0,
+    })
+    return row
+
+
+def predict(model, rows):
+    """
+    model.predict over feature rows. Models fitted on numeric named columns get a float64
+    array in their feature_names_in_ order (no pandas on the hot path); anything else,
+    e.g. a pipeline with categorical string inputs, falls back to a DataFrame.
+    """
+    columns = getattr(model, "feature_names_in_", None)
+    if columns is not None and all(c in rows[0] and not isinstance(rows[0][c], str) for c in columns):
+        with metrics.timer("features"):
+            X = np.array([[r[c] for c in columns] for r in rows], dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            return model.predict(X)
+
+    import pandas as pd
+    with metrics.timer("features"):
+        X = pd.DataFrame(rows)
+    return model.predict(X)
+
+
+def warmup():
+    """Import the model stack and load the served model up front (ANALYTICS_WARMUP)."""
+    import joblib  # noqa: F401
+    if active_model_path() is not None:
+        get_model()
+
+
+# -----------------------
+# Materialized forecasts
+# -----------------------
+def lookup(day, seasons, holiday, functioning_day):
+    """24 stored predictions for the day/flags if materialized by the current model, else None."""
+    version = model_version()
+    if version is None:
+        return None
+    preds = list(
+        ForecastHourly.objects.filter(
+            date=day, seasons=seasons, holiday=holiday, functioning_day=functioning_day,
+            model_version=version,
+        ).order_by("hour").values_list("pred", flat=True)
+    )
+    return preds if len(preds) == 24 else None
+
+
+def materialize(start, days):
+    """
+    Predict every hour of [start, start+days) for all holiday x functioning_day flags
+    in a single model.predict call and replace the stored rows. Returns rows written.
+    """
+    model = get_model()
+    version = model_version()
+    weather = {}
+    keys, rows = [], []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        season = SEASON_BY_MONTH[day.month]
+        if season not in weather:
+            weather[season] = seasonal_hourly_weather(season)
+        for holiday in HOLIDAY_FLAGS:
+            for fday in FUNCTIONING_FLAGS:
+                for h in range(24):
+                    keys.append((day, h, season, holiday, fday))
+                    rows.append(feature_row(h, weather[season].get(h, {}), day.weekday(), day.month,
+                                            season, holiday, fday))
+    if not rows:
+        return 0
+
+    with metrics.timer("predict"):
+        yhat = predict(model, rows)
+    objs = [
+        ForecastHourly(date=d, hour=h, seasons=s, holiday=hol, functioning_day=f,
+                       pred=round(float(v), 2), model_version=version)
+        for (d, h, s, hol, f), v in zip(keys, yhat)
+    ]
+    with transaction.atomic():
+        ForecastHourly.objects.filter(date__gte=start, date__lt=start + timedelta(days=days)).delete()
+        ForecastHourly.objects.bulk_create(objs)
+    return len(objs)
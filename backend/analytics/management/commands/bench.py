@@ -0,0 +1,314 @@
+import json
+import logging
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from analytics import forecasts
+
+DEFAULT_CSV = Path(__file__).resolve().parents[4] / "data" / "SeoulBikeData.csv"
+
+STEPS = ["ingest_seoul_bike", "build_daily_aggregates", "train_demand_model", "api"]
+
+GET_ENDPOINTS = [
+    "meta/date-bounds",
+    "kpis/basic",
+    "kpis/basic?season=Winter",
+    "kpis/hourly-heatmap",
+    "kpis/rolling?metric=total_rides&window=28",
+    "daily/",
+    "hourly/",
+]
+POST_ENDPOINTS = {
+    "predict/day": {"date": "2018-01-15", "seasons": "Winter", "holiday": "No Holiday", "functioning_day": "Yes"},
+    "predict/hour": {
+        "date": "2018-01-15", "hour": 7, "temperature_c": -3.0, "humidity_pct": 50, "windspeed_ms": 1.2,
+        "visibility_10m": 2000, "dew_point_c": -5.0, "solar_radiation_mj_m2": 0.0, "rainfall_mm": 0.0,
+        "snowfall_cm": 0.0, "seasons": "Winter", "holiday": "No Holiday", "functioning_day": "Yes",
+    },
+}
+
+# relative jitter applied to replicated years; replica 0 is the source data unchanged
+JITTER = {
+    "Temperature(°C)": ("add", 1.0),
+    "Dew point temperature(°C)": ("add", 1.0),
+    "Humidity(%)": ("add", 3.0),
+    "Rented Bike Count": ("mul", 0.10),
+    "Wind speed (m/s)": ("mul", 0.10),
+    "Visibility (10m)": ("mul", 0.05),
+    "Solar Radiation (MJ/m2)": ("mul", 0.05),
+    "Rainfall(mm)": ("mul", 0.10),
+    "Snowfall (cm)": ("mul", 0.10),
+}
+CLIP = {
+    "Humidity(%)": (0, 100),
+    "Visibility (10m)": (0, 2000),
+    "Rented Bike Count": (0, None),
+}
+INT_COLUMNS = ["Rented Bike Count", "Humidity(%)", "Visibility (10m)"]
+
+
+def read_source(path):
+    try:
+        return pd.read_csv(path)
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding="latin1")
+
+
+def synthesize(src, scale, seed=42):
+    """
+    Tile the source year `scale` times onto consecutive dates. Each replica keeps the
+    source's hour/season/holiday structure and jitters the measures, so schema and
+    marginal distributions match SeoulBikeData.csv.
+    """
+    src = src.rename(columns=lambda c: c.strip())
+    dates = pd.to_datetime(src["Date"], format="%d/%m/%Y")
+    day_offset = (dates - dates.min()).dt.days.to_numpy()
+    span = int(day_offset.max()) + 1
+
+    rng = np.random.default_rng(seed)
+    n = len(src)
+    out = pd.concat([src] * scale, ignore_index=True)
+    replica = np.repeat(np.arange(scale), n)
+
+    new_dates = dates.min() + pd.to_timedelta(np.tile(day_offset, scale) + replica * span, unit="D")
+    out["Date"] = new_dates.strftime("%d/%m/%Y")
+
+    jittered = replica > 0
+    for col, (kind, sigma) in JITTER.items():
+        if col not in out.columns:
+            continue
+        values = out[col].to_numpy(dtype=float)
+        noise = rng.normal(0.0, sigma, size=len(out))
+        if kind == "add":
+            values = np.where(jittered, values + noise, values)
+        else:
+            values = np.where(jittered, values * np.exp(noise), values)
+        lo, hi = CLIP.get(col, (0, None) if kind == "mul" else (None, None))
+        if lo is not None or hi is not None:
+            values = np.clip(values, lo, hi)
+        out[col] = np.round(values).astype(int) if col in INT_COLUMNS else np.round(values, 1)
+    return out
+
+
+def percentiles(samples):
+    arr = np.asarray(samples) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+    }
+
+
+def flatten(results):
+    """
+    {"<scale>/<section>/<name>[/<mode>]/<stat>": value} for every timing in a results doc,
+    plus "<scale>x/steps/<step>/error" for failed steps, "<scale>x/api/<ep>/status" and
+    "<scale>x/api/<ep>/skipped" for endpoints that weren't benchmarked.
+    """
+    flat = {}
+    for scale, r in results.get("scales", {}).items():
+        for step, v in r.get("steps", {}).items():
+            if "seconds" in v:
+                flat[f"{scale}x/steps/{step}/seconds"] = v["seconds"]
+            elif "error" in v:
+                flat[f"{scale}x/steps/{step}/error"] = v["error"]
+        for ep, v in r.get("api", {}).items():
+            if "skipped" in v:
+                flat[f"{scale}x/api/{ep}/skipped"] = v["skipped"]
+                continue
+            flat[f"{scale}x/api/{ep}/status"] = v.get("status")
+            for mode in ("cold", "warm"):
+                for stat, val in v.get(mode, {}).items():
+                    flat[f"{scale}x/api/{ep}/{mode}/{stat}"] = val
+    return flat
+
+
+def compare(current, baseline, threshold=0.2, min_delta=0.001):
+    """
+    Regressions vs baseline as [(key, baseline, current, ratio), ...]:
+      - timings slower by more than `threshold` (fractional) and `min_delta` (seconds,
+        or ms for api stats);
+      - timings the baseline has but the current run lost (step errored or endpoint
+        missing), with the error text (or None) as current and ratio None;
+      - any change in an endpoint's HTTP status.
+    Scales and steps the current run didn't ask for (meta.steps), and endpoints it marked
+    skipped, are ignored so `--steps`/`--scales` subsets can still be compared.
+    """
+    cur, base = flatten(current), flatten(baseline)
+    scales = {f"{scale}x" for scale in current.get("scales", {})}
+    requested = set(current.get("meta", {}).get("steps", STEPS))
+    skipped = {key[:-len("/skipped")] + "/" for key in cur if key.endswith("/skipped")}
+    regressions = []
+    for key, b in base.items():
+        scale, kind, name = key.split("/", 2)
+        step = "api" if kind == "api" else name.rsplit("/", 1)[0]
+        if scale not in scales or step not in requested or key.endswith(("/error", "/skipped")):
+            continue
+        if any(key.startswith(prefix) for prefix in skipped):
+            continue
+        c = cur.get(key)
+        if key.endswith("/status"):
+            if c != b:
+                regressions.append((key, b, c, None))
+            continue
+        if c is None:
+            regressions.append((key, b, cur.get(key.rsplit("/", 1)[0] + "/error"), None))
+            continue
+        if b is None:
+            continue
+        delta = min_delta * 1000 if key.endswith("_ms") else min_delta
+        if c > b * (1 + threshold) and c - b > delta:
+            regressions.append((key, b, c, round(c / b, 2) if b else float("inf")))
+    return regressions
+
+
+class Command(BaseCommand):
+    help = "Benchmark ingest, aggregation, training and API latency on synthetic 1x/10x/100x data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=str(DEFAULT_CSV), help="Source SeoulBikeData.csv")
+        parser.add_argument("--scales", default="1,10,100", help="Comma-separated data multipliers")
+        parser.add_argument("--steps", default=",".join(STEPS), help=f"Subset of {','.join(STEPS)}")
+        parser.add_argument("--iterations", type=int, default=30, help="Requests per endpoint per cache mode")
+        parser.add_argument("--output", default="bench_results.json", help="Where to write results JSON")
+        parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+        parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        src_path = Path(opts["source"])
+        if not src_path.exists():
+            raise CommandError(f"File {src_path} does not exist")
+        steps = [s for s in opts["steps"].split(",") if s]
+        unknown = set(steps) - set(STEPS)
+        if unknown:
+            raise CommandError(f"Unknown steps {sorted(unknown)}")
+        scales = [int(s) for s in opts["scales"].split(",") if s]
+
+        src = read_source(src_path)
+        results = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "source_rows": len(src),
+                "iterations": opts["iterations"],
+                "steps": steps,
+            },
+            "scales": {},
+        }
+
+        with tempfile.TemporaryDirectory(prefix="sobike-bench-") as tmp:
+            tmp = Path(tmp)
+            # isolated on-disk database and model store so the benchmark never touches
+            # real data, and predict/* only ever serves the model trained here
+            old_name = connection.settings_dict["NAME"]
+            old_models_dir = forecasts.MODELS_DIR
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = str(tmp / "bench.sqlite3")
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            forecasts.MODELS_DIR = tmp / "models_store"
+            try:
+                for scale in scales:
+                    self.stdout.write(f"→ {scale}x")
+                    results["scales"][str(scale)] = self._run_scale(src, scale, steps, tmp, opts)
+            finally:
+                forecasts.MODELS_DIR = old_models_dir
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        Path(opts["output"]).write_text(json.dumps(results, indent=2, default=str))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {opts['output']}"))
+
+        if opts["compare"]:
+            baseline = json.loads(Path(opts["compare"]).read_text())
+            regressions = compare(results, baseline, threshold=opts["threshold"])
+            for key, b, c, ratio in regressions:
+                change = f"{b} → {c}" + (f" ({ratio}x)" if ratio is not None else "")
+                self.stdout.write(self.style.ERROR(f"REGRESSION {key}: {change}"))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) vs {opts['compare']}")
+            self.stdout.write(self.style.SUCCESS("No regressions vs baseline."))
+
+    def _timed(self, fn):
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as exc:  # record and keep benchmarking the other steps
+            return {"error": f"{type(exc).__name__}: {exc}"}
+        return {"seconds": round(time.perf_counter() - t0, 4)}
+
+    def _run_scale(self, src, scale, steps, tmp, opts):
+        csv_path = tmp / f"seoul_bike_{scale}x.csv"
+        data = synthesize(src, scale, seed=opts["seed"])
+        data.to_csv(csv_path, index=False, encoding="latin1")
+        out = {"rows": len(data), "steps": {}, "api": {}}
+        quiet = StringIO()
+
+        if "ingest_seoul_bike" in steps:
+            out["steps"]["ingest_seoul_bike"] = self._timed(
+                lambda: call_command("ingest_seoul_bike", path=str(csv_path), truncate=True, stdout=quiet)
+            )
+        if "build_daily_aggregates" in steps:
+            out["steps"]["build_daily_aggregates"] = self._timed(
+                lambda: call_command("build_daily_aggregates", stdout=quiet)
+            )
+        if "train_demand_model" in steps:
+            out["steps"]["train_demand_model"] = self._timed(
+                lambda: call_command("train_demand_model", output=str(forecasts.MODELS_DIR / "model_v2.joblib"),
+                                     no_materialize=True, stdout=quiet)
+            )
+        for step, v in out["steps"].items():
+            self.stdout.write(f"  {step}: {v}")
+
+        if "api" in steps:
+            out["api"] = self._bench_api(opts["iterations"])
+        return out
+
+    def _bench_api(self, iterations):
+        client = Client(raise_request_exception=False)
+        requests = [(ep, lambda ep=ep: client.get(f"/api/v1/{ep}")) for ep in GET_ENDPOINTS]
+        results = {}
+        if forecasts.active_model_path() is not None:
+            requests += [
+                (ep, lambda ep=ep, body=body: client.post(f"/api/v1/{ep}", data=body, content_type="application/json"))
+                for ep, body in POST_ENDPOINTS.items()
+            ]
+        else:  # timing 500s would say nothing about prediction latency
+            for ep in POST_ENDPOINTS:
+                results[ep] = {"skipped": "no model trained in this run (include train_demand_model in --steps)"}
+                self.stdout.write(f"  {ep} skipped: no trained model")
+
+        # 5xx are recorded via status; don't log a traceback per request
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            for ep, send in requests:
+                cold, warm = [], []
+                status = None
+                for _ in range(iterations):
+                    cache.clear()
+                    t0 = time.perf_counter()
+                    status = send().status_code
+                    cold.append(time.perf_counter() - t0)
+                send()  # prime
+                for _ in range(iterations):
+                    t0 = time.perf_counter()
+                    send()
+                    warm.append(time.perf_counter() - t0)
+                results[ep] = {"status": status, "cold": percentiles(cold), "warm": percentiles(warm)}
+                self.stdout.write(f"  {ep} [{status}] cold p50={results[ep]['cold']['p50_ms']}ms "
+                                  f"warm p50={results[ep]['warm']['p50_ms']}ms")
+        finally:
+            request_logger.setLevel(level)
+        return results
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from analytics import metrics
 from analytics.models import SeoulBikeHourly, SeoulBikeDailyAgg
 import pandas as pd
 
@@ -14,12 +15,14 @@ def mode_or_empty(series):
 class Command(BaseCommand):
     help = "Aggregate hourly → daily and compute rolling 7/30 day totals."
 
+    @metrics.track("command:build_daily_aggregates")
     def handle(self, *args, **opts):
         qs = SeoulBikeHourly.objects.all().values(
             "date", "rented_bike_count", "temperature_c", "humidity_pct",
             "windspeed_ms", "seasons", "holiday", "functioning_day"
         )
-        df = pd.DataFrame(list(qs))
+        with metrics.timer("load"):
+            df = pd.DataFrame(list(qs))
         if df.empty:
             self.stdout.write("No hourly data to aggregate.")
             return
@@ -42,7 +45,6 @@ class Command(BaseCommand):
         g["roll30_total"] = g["total_rides"].rolling(30, min_periods=1).mean()
 
         # upsert strategy: replace all
-        SeoulBikeDailyAgg.objects.all().delete()
         objs = [
             SeoulBikeDailyAgg(
                 date=row.date,
@@ -58,5 +60,7 @@ class Command(BaseCommand):
             )
             for _, row in g.iterrows()
         ]
-        SeoulBikeDailyAgg.objects.bulk_create(objs)
+        with metrics.timer("write"):
+            SeoulBikeDailyAgg.objects.all().delete()
+            SeoulBikeDailyAgg.objects.bulk_create(objs)
         self.stdout.write(self.style.SUCCESS(f"Built {len(objs)} daily aggregates."))
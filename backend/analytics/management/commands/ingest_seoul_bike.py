@@ -1,5 +1,6 @@
 import pandas as pd
 from django.core.management.base import BaseCommand
+from analytics import metrics
 from analytics.models import SeoulBikeHourly
 from pathlib import Path
 
@@ -20,13 +21,22 @@ COLUMN_MAP = {
     "Functioning Day": "functioning_day",
 }
 
+UPSERT_FIELDS = [
+    "rented_bike_count", "temperature_c", "humidity_pct", "windspeed_ms", "visibility_10m",
+    "dew_point_c", "solar_radiation_mj_m2", "rainfall_mm", "snowfall_cm",
+    "seasons", "holiday", "functioning_day", "updated_at",
+]
+
 class Command(BaseCommand):
     help = "Ingest SeoulBikeData.csv into SeoulBikeHourly (typed)."
 
     def add_arguments(self, parser):
         parser.add_argument("--path", required=True, help="Path to SeoulBikeData.csv")
         parser.add_argument("--truncate", action="store_true", help="Delete existing rows before ingest")
+        parser.add_argument("--upsert", action="store_true",
+                            help="Overwrite values of existing (date, hour) rows instead of keeping them")
 
+    @metrics.track("command:ingest_seoul_bike")
     def handle(self, *args, **opts):
         csv_path = Path(opts["path"])
         if not csv_path.exists():
@@ -36,10 +46,11 @@ class Command(BaseCommand):
             SeoulBikeHourly.objects.all().delete()
 
         # read CSV with exact colum names preserved
-        try:
-            df = pd.read_csv(csv_path)
-        except UnicodeDecodeError:
-            df = pd.read_csv(csv_path, encoding="latin1")
+        with metrics.timer("read_csv"):
+            try:
+                df = pd.read_csv(csv_path)
+            except UnicodeDecodeError:
+                df = pd.read_csv(csv_path, encoding="latin1")
 
         # normalize column names to the COLUMN_MAP keys
         cols = {c.strip(): c.strip() for c in df.columns}
@@ -99,6 +110,14 @@ class Command(BaseCommand):
                 holiday=rec.get("holiday", "Unknown"),
                 functioning_day=rec.get("functioning_day", "Unknown"),
             ))
-        # simple strategy: wipe duplicates if they violate unique constraint, so use bulk_create(ignore_conflicts=True)
-        SeoulBikeHourly.objects.bulk_create(rows, ignore_conflicts=True)
+        # simple strategy: wipe duplicates if they violate unique constraint, so use bulk_create(ignore_conflicts=True);
+        # --upsert rewrites them instead (corrected values for existing keys) and bumps updated_at
+        with metrics.timer("bulk_create"):
+            if opts["upsert"]:
+                SeoulBikeHourly.objects.bulk_create(
+                    rows, update_conflicts=True, unique_fields=["date", "hour"],
+                    update_fields=UPSERT_FIELDS,
+                )
+            else:
+                SeoulBikeHourly.objects.bulk_create(rows, ignore_conflicts=True)
         self.stdout.write(self.style.SUCCESS(f"Ingested {len(rows)} rows from {csv_path.name}."))
\ No newline at end of file
@@ -0,0 +1,70 @@
+import pandas as pd
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from analytics import metrics, stations
+from analytics.models import Station
+from pathlib import Path
+
+STATION_COLUMNS = ["station_id", "name", "district", "latitude", "longitude"]
+FACT_COLUMNS = ["station_id", "date", "hour", "rented_bike_count"]
+
+class Command(BaseCommand):
+    help = "Ingest station dimension + station-hourly facts into monthly partitions and rebuild rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", help="CSV with station_id,name,district,latitude,longitude")
+        parser.add_argument("--hourly", help="CSV with station_id,date,hour,rented_bike_count")
+        parser.add_argument("--chunksize", type=int, default=500_000, help="Fact rows read per chunk")
+        parser.add_argument("--skip-daily", action="store_true", help="Don't rerun build_daily_aggregates")
+
+    @metrics.track("command:ingest_station_data")
+    def handle(self, *args, **opts):
+        if opts["stations"]:
+            self._ingest_stations(Path(opts["stations"]))
+        if not opts["hourly"]:
+            return
+
+        hourly_path = Path(opts["hourly"])
+        if not hourly_path.exists():
+            raise SystemExit(f"File {hourly_path} does not exist")
+
+        touched, n = set(), 0
+        with metrics.timer("write_partitions"):
+            for chunk in pd.read_csv(hourly_path, usecols=FACT_COLUMNS, chunksize=opts["chunksize"]):
+                chunk["date"] = pd.to_datetime(chunk["date"], errors="coerce").dt.date
+                chunk = chunk.dropna(subset=["date"])
+                touched |= stations.write_facts(chunk)
+                n += len(chunk)
+        self.stdout.write(f"  wrote {n} station-hourly rows into {len(touched)} monthly partitions")
+
+        with metrics.timer("rollups"):
+            coverage = stations.rebuild_rollups(touched)
+        for (year, month), (orphaned, uncovered) in sorted(coverage.items()):
+            if orphaned or uncovered:
+                self.stdout.write(self.style.WARNING(
+                    f"  {year:04d}-{month:02d}: {orphaned} fact hour(s) without a city row, "
+                    f"{uncovered} city hour(s) without station facts (kept their CSV counts)"
+                ))
+        if not opts["skip_daily"]:
+            call_command("build_daily_aggregates", stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {len(touched)} month(s) from {hourly_path.name}."))
+
+    def _ingest_stations(self, path):
+        if not path.exists():
+            raise SystemExit(f"File {path} does not exist")
+        df = pd.read_csv(path, usecols=lambda c: c in STATION_COLUMNS)
+        objs = [
+            Station(
+                station_id=str(rec["station_id"]),
+                name=str(rec.get("name", "") or ""),
+                district=str(rec["district"]),
+                latitude=float(rec["latitude"]) if pd.notna(rec.get("latitude")) else None,
+                longitude=float(rec["longitude"]) if pd.notna(rec.get("longitude")) else None,
+            )
+            for rec in df.to_dict(orient="records")
+        ]
+        Station.objects.bulk_create(
+            objs, update_conflicts=True, unique_fields=["station_id"],
+            update_fields=["name", "district", "latitude", "longitude"],
+        )
+        self.stdout.write(f"  upserted {len(objs)} stations")
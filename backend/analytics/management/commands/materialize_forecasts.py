@@ -0,0 +1,25 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from analytics import forecasts, metrics
+
+class Command(BaseCommand):
+    help = "Precompute hourly forecasts for the next N days x holiday x functioning_day flags."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=14, help="How many days ahead to materialize")
+        parser.add_argument("--start", help="First date (YYYY-MM-DD); defaults to today")
+
+    @metrics.track("command:materialize_forecasts")
+    def handle(self, *args, **opts):
+        start = date.fromisoformat(opts["start"]) if opts["start"] else timezone.localdate()
+        if opts["days"] < 1:
+            raise CommandError("--days must be >= 1")
+        try:
+            n = forecasts.materialize(start, opts["days"])
+        except RuntimeError as exc:  # no promoted model yet
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Materialized {n} hourly forecasts from {start} ({opts['days']} days) "
+            f"with model {forecasts.model_version()}."
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from analytics import pipeline
+
+class Command(BaseCommand):
+    help = "Run ingest → rollup → aggregate → retrain, skipping steps whose inputs are unchanged since their last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--csv", help="SeoulBikeData.csv for the ingest step (default: ANALYTICS_PIPELINE_CSV)")
+        parser.add_argument("--steps", nargs="+", choices=list(pipeline.STEPS),
+                            help="Target steps; their dependencies are included")
+        parser.add_argument("--force", action="store_true", help="Run every step even if its inputs are unchanged")
+
+    def handle(self, *args, **opts):
+        # runs in the foreground; the API queues the same job on the background worker instead
+        job, created = pipeline.claim(opts["steps"], csv=opts["csv"], force=opts["force"], triggered_by="run_pipeline")
+        if not created:
+            raise CommandError(f"Pipeline job {job.pk} is already {job.status}; try again when it finishes.")
+        job = pipeline.run(job.pk, stdout=self.stdout)
+
+        for step in job.steps.all():
+            self.stdout.write(
+                f"  {step.name:<10} {step.status:<10} {step.duration_s or 0:>8.2f}s  "
+                f"rows_in={step.rows_in} rows_out={step.rows_out}"
+                + (f"  ({step.message})" if step.message else "")
+            )
+        if job.status != "succeeded":
+            raise CommandError(f"Pipeline job {job.pk} failed: {job.error}")
+        self.stdout.write(self.style.SUCCESS(f"Pipeline job {job.pk} finished."))
@@ -1,20 +1,31 @@
 import numpy as np
 import pandas as pd
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from backend.analytics.models import SeoulBikeHourly
+from analytics import forecasts, metrics
+from analytics.models import SeoulBikeHourly
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import cross_val_score, KFold
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import joblib
 import os
+from pathlib import Path
 
 class Command(BaseCommand):
     help = "Train a bike demand prediction model"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=str(forecasts.MODELS_DIR / "model_v2.joblib"),
+                            help="Where to save the trained model")
+        parser.add_argument("--no-materialize", action="store_true",
+                            help="Don't refresh materialized forecasts after promoting the model")
+
+    @metrics.track("command:train_demand_model")
     def handle(self, *args, **options):
         self.stdout.write("→ Loading hourly data from DB…")
-        data = list(SeoulBikeHourly.objects.all().values())
-        df = pd.DataFrame(data)
+        with metrics.timer("load"):
+            data = list(SeoulBikeHourly.objects.all().values())
+            df = pd.DataFrame(data)
         self.stdout.write(f"  rows fetched: {len(df)}")
 
         # Sort by date & hour
@@ -27,7 +38,7 @@ class Command(BaseCommand):
         df["is_holiday"] = df["holiday"].apply(lambda x: 1 if x.lower() != "no holiday" else 0)
         df["season"] = df["seasons"].map({"Winter": 0, "Spring": 1, "Summer": 2, "Autumn": 3})
 
-        features = ["hour_sin", "hour_cos", "temperature", "humidity", "windspeed", "visibility", "dew_point", "solar_radiation", "rainfall", "snowfall", "season", "is_holiday"]
+        features = ["hour_sin", "hour_cos", "temperature_c", "humidity_pct", "windspeed_ms", "visibility_10m", "dew_point_c", "solar_radiation_mj_m2", "rainfall_mm", "snowfall_cm", "season", "is_holiday"]
         target = "rented_bike_count"
 
         X = df[features]
@@ -38,14 +49,16 @@ class Command(BaseCommand):
 
         # Cross-validation
         kf = KFold(n_splits=5, shuffle=True, random_state=42)
-        mae_scores = -cross_val_score(model, X, y, cv=kf, scoring="neg_mean_absolute_error")
-        rmse_scores = np.sqrt(-cross_val_score(model, X, y, cv=kf, scoring="neg_mean_squared_error"))
+        with metrics.timer("cross_validate"):
+            mae_scores = -cross_val_score(model, X, y, cv=kf, scoring="neg_mean_absolute_error")
+            rmse_scores = np.sqrt(-cross_val_score(model, X, y, cv=kf, scoring="neg_mean_squared_error"))
 
-        model.fit(X, y)
+        with metrics.timer("fit"):
+            model.fit(X, y)
 
         # Save the model
-        os.makedirs("models_store", exist_ok=True)
-        model_path = "models_store/model_v2.joblib"
+        model_path = options["output"]
+        os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
         joblib.dump(model, model_path)
 
         self.stdout.write(
@@ -53,3 +66,7 @@ class Command(BaseCommand):
             f"RMSE={rmse_scores.mean():.2f}±{rmse_scores.std():.2f}. "
             f"Saved to {os.path.abspath(model_path)}"
         )
+
+        # writing the served model file promotes it; stored forecasts are now stale
+        if forecasts.active_model_path() == Path(model_path).resolve() and not options["no_materialize"]:
+            call_command("materialize_forecasts", stdout=self.stdout)
@@ -0,0 +1,180 @@
+"""
+In-process hot-path metrics, rendered in Prometheus text format at /api/v1/metrics.
+
+Everything recorded inside `track(label)` (a request via MetricsMiddleware, or a
+management command) is attributed to that label: SQL query count/time, cache
+hits/misses, named stage timings (feature build, model load/predict, serialize)
+and rows serialized. Counters live per process; there is no external client library.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+_scope = ContextVar("analytics_metrics_scope", default=None)
+
+
+class _Scope:
+    def __init__(self, label):
+        self._label = label  # str, or a callable resolved on use (URL is resolved mid-request)
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+
+    @property
+    def label(self):
+        return self._label() if callable(self._label) else self._label
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._meta = {}        # name -> (type, help, buckets)
+
+    def _declare(self, name, kind, help_text, buckets=None):
+        self._meta.setdefault(name, (kind, help_text, buckets))
+
+    def inc(self, name, labels, value=1, help_text=""):
+        self._declare(name, "counter", help_text)
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS, help_text=""):
+        self._declare(name, "histogram", help_text, buckets)
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    h[i] += 1
+            h[-2] += value
+            h[-1] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        def fmt(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, list(v)) for k, v in self._histograms.items())
+        lines = []
+        for name, (kind, help_text, buckets) in sorted(self._meta.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (n, labels), value in counters:
+                    if n == name:
+                        lines.append(f"{name}{fmt(labels)} {value}")
+            else:
+                for (n, labels), h in histograms:
+                    if n != name:
+                        continue
+                    for bound, count in zip(buckets, h):
+                        lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {h[-1]}")
+                    lines.append(f"{name}_sum{fmt(labels)} {h[-2]}")
+                    lines.append(f"{name}_count{fmt(labels)} {h[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def current_label():
+    scope = _scope.get()
+    return scope.label if scope else "untracked"
+
+
+def _sql_wrapper(scope, execute, sql, params, many, context):
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        scope.sql_queries += 1
+        scope.sql_seconds += time.perf_counter() - t0
+
+
+@contextmanager
+def track(label):
+    """
+    Attribute SQL, cache and stage metrics recorded inside the block to `label` (str or
+    callable). SQL counts are inclusive: a query inside nested scopes (pipeline.run ->
+    a tracked command) counts once for each enclosing scope.
+    """
+    scope = _Scope(label)
+    token = _scope.set(scope)
+    try:
+        # bound to this scope; nested scopes stack wrappers, each counting for its own scope
+        with connection.execute_wrapper(partial(_sql_wrapper, scope)):
+            yield scope
+    finally:
+        _scope.reset(token)
+        labels = {"endpoint": scope.label}
+        registry.inc("analytics_sql_queries_total", labels, scope.sql_queries,
+                     help_text="SQL queries executed.")
+        registry.inc("analytics_sql_seconds_total", labels, scope.sql_seconds,
+                     help_text="Time spent executing SQL.")
+        registry.observe("analytics_sql_queries_per_scope", labels, scope.sql_queries, buckets=COUNT_BUCKETS,
+                         help_text="SQL queries per request or command run.")
+
+
+@contextmanager
+def timer(stage):
+    """Time a named hot-path stage (features, model_load, predict, serialize, ...)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe("analytics_stage_seconds", {"endpoint": current_label(), "stage": stage},
+                         time.perf_counter() - t0, help_text="Time spent in a named hot-path stage.")
+
+
+def rows_serialized(n):
+    registry.inc("analytics_rows_serialized_total", {"endpoint": current_label()}, n,
+                 help_text="Rows serialized into responses.")
+
+
+def cache_result(hit):
+    registry.inc("analytics_cache_requests_total", {"endpoint": current_label(), "result": "hit" if hit else "miss"},
+                 help_text="Cache lookups by result.")
+
+
+_MISSING = object()
+
+
+_CACHE_HEADER_PREFIX = "views.decorators.cache.cache_header."
+
+
+class MetricsLocMemCache(LocMemCache):
+    """
+    LocMemCache that reports hits/misses (including cache_page lookups) to the registry.
+    cache_page reads a header-list key and then, only if that exists, the response key;
+    header-key hits aren't counted so each cache_page lookup counts exactly once.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING or not str(key).startswith(_CACHE_HEADER_PREFIX):
+            cache_result(value is not _MISSING)
+        return default if value is _MISSING else value
@@ -0,0 +1,75 @@
+import cProfile
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from . import metrics
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+_profile_lock = threading.Lock()
+
+
+def _endpoint(request):
+    match = getattr(request, "resolver_match", None)
+    # router routes are regexes ("hourly/(?P<pk>[^/.]+)/$"); drop only the anchors
+    return "/" + match.route.removeprefix("^").removesuffix("$") if match is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Per-request latency, SQL, cache and stage metrics (see analytics.metrics). A request
+    carrying `X-Profile: 1` is run under cProfile when ANALYTICS_PROFILE_DIR is set,
+    sampled by ANALYTICS_PROFILE_SAMPLE_RATE; the dump path is echoed in `X-Profile-Dump`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        t0 = time.perf_counter()
+        profiler = self._maybe_profiler(request)
+        with metrics.track(lambda: _endpoint(request)) as scope:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    _profile_lock.release()
+        elapsed = time.perf_counter() - t0
+
+        labels = {"endpoint": scope.label, "method": request.method}
+        metrics.registry.observe("analytics_request_seconds", labels, elapsed,
+                                 help_text="Request latency by endpoint.")
+        metrics.registry.inc("analytics_requests_total", {**labels, "status": str(response.status_code)},
+                             help_text="Requests by endpoint and status.")
+        if profiler is not None:
+            response["X-Profile-Dump"] = self._dump(profiler, scope.label)
+        return response
+
+    @staticmethod
+    def _maybe_profiler(request):
+        if not getattr(settings, "ANALYTICS_PROFILE_DIR", None):
+            return None
+        if request.META.get(PROFILE_HEADER, "").lower() not in ("1", "true", "yes"):
+            return None
+        if random.random() >= getattr(settings, "ANALYTICS_PROFILE_SAMPLE_RATE", 1.0):
+            return None
+        # one profiler at a time; concurrent profiled requests are simply not sampled
+        if not _profile_lock.acquire(blocking=False):
+            return None
+        return cProfile.Profile()
+
+    @staticmethod
+    def _dump(profiler, label):
+        out_dir = Path(settings.ANALYTICS_PROFILE_DIR)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "root"
+        path = out_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{int(time.time() * 1000) % 1000:03d}.prof"
+        profiler.dump_stats(path)
+        return path.name
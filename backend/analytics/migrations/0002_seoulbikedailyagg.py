@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeoulBikeDailyAgg",
+            fields=[
+                ("date", models.DateField(primary_key=True, serialize=False)),
+                ("total_rides", models.IntegerField()),
+                ("avg_temp_c", models.FloatField()),
+                ("avg_humidity_pct", models.FloatField()),
+                ("avg_windspeed_ms", models.FloatField()),
+                ("roll7_total", models.FloatField(blank=True, null=True)),
+                ("roll30_total", models.FloatField(blank=True, null=True)),
+                ("seasons_mode", models.CharField(blank=True, default="", max_length=16)),
+                ("holiday_any", models.BooleanField(default=False)),
+                ("functioning_all_yes", models.BooleanField(default=True)),
+                ("ingested_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["date"], name="analytics_s_date_9f50e2_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0002_seoulbikedailyagg"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="seoulbikehourly",
+            name="analytics_s_date_a7e238_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="seoulbikehourly",
+            name="analytics_s_hour_e997e8_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="seoulbikehourly",
+            name="analytics_s_seasons_a25c59_idx",
+        ),
+        migrations.AddIndex(
+            model_name="seoulbikehourly",
+            index=models.Index(
+                fields=[
+                    "date",
+                    "hour",
+                    "rented_bike_count",
+                    "temperature_c",
+                    "humidity_pct",
+                ],
+                name="hourly_date_kpi_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="seoulbikehourly",
+            index=models.Index(
+                fields=[
+                    "seasons",
+                    "date",
+                    "hour",
+                    "rented_bike_count",
+                    "temperature_c",
+                    "humidity_pct",
+                ],
+                name="hourly_season_date_kpi_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="seoulbikehourly",
+            index=models.Index(
+                fields=[
+                    "seasons",
+                    "hour",
+                    "date",
+                    "rented_bike_count",
+                    "temperature_c",
+                    "humidity_pct",
+                    "windspeed_ms",
+                    "visibility_10m",
+                    "dew_point_c",
+                    "solar_radiation_mj_m2",
+                    "rainfall_mm",
+                    "snowfall_cm",
+                ],
+                name="hourly_season_hour_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0003_hourly_covering_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Station",
+            fields=[
+                (
+                    "station_id",
+                    models.CharField(max_length=32, primary_key=True, serialize=False),
+                ),
+                ("name", models.CharField(blank=True, default="", max_length=128)),
+                ("district", models.CharField(db_index=True, max_length=64)),
+                ("latitude", models.FloatField(blank=True, null=True)),
+                ("longitude", models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DistrictHourlyAgg",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("district", models.CharField(max_length=64)),
+                ("date", models.DateField()),
+                ("hour", models.PositiveSmallIntegerField()),
+                ("rented_bike_count", models.IntegerField()),
+                ("seasons", models.CharField(blank=True, default="", max_length=16)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "district",
+                            "seasons",
+                            "date",
+                            "hour",
+                            "rented_bike_count",
+                        ],
+                        name="district_season_date_idx",
+                    )
+                ],
+                "unique_together": {("district", "date", "hour")},
+            },
+        ),
+        migrations.CreateModel(
+            name="StationDailyAgg",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("total_rides", models.IntegerField()),
+                ("hours", models.PositiveSmallIntegerField()),
+                ("seasons", models.CharField(blank=True, default="", max_length=16)),
+                (
+                    "station",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="analytics.station",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["station", "seasons", "date", "total_rides", "hours"],
+                        name="station_season_date_idx",
+                    )
+                ],
+                "unique_together": {("station", "date")},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0004_station_dimension"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ForecastHourly",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("hour", models.PositiveSmallIntegerField()),
+                ("seasons", models.CharField(max_length=16)),
+                ("holiday", models.CharField(max_length=16)),
+                ("functioning_day", models.CharField(max_length=8)),
+                ("pred", models.FloatField()),
+                ("model_version", models.CharField(max_length=128)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "unique_together": {
+                    ("date", "seasons", "holiday", "functioning_day", "hour")
+                },
+            },
+        ),
+    ]
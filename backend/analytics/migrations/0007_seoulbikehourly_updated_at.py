@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0006_pipeline_jobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="seoulbikehourly",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0007_seoulbikehourly_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pipelinejob",
+            name="worker",
+            field=models.CharField(blank=True, default="", max_length=128),
+        ),
+    ]
@@ -1,4 +1,8 @@
 from django.db import models
+from django.db.models import Avg, Count, F, FloatField, Func, Sum, ValueRange, Window
+
+# daily columns that can be fed to SeoulBikeDailyAggQuerySet.rolling()
+ROLLING_METRICS = ("total_rides", "avg_temp_c", "avg_humidity_pct", "avg_windspeed_ms")
 
 class SeoulBikeHourly(models.Model):
     # core keys
@@ -24,19 +28,60 @@ class SeoulBikeHourly(models.Model):
     functioning_day = models.CharField(max_length=8) # e.g., Yes/No
 
     ingested_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # bumped by `ingest_seoul_bike --upsert`
 
     class Meta:
         unique_together = ("date", "hour")
         indexes = [
-            models.Index(fields=["date"]),
-            models.Index(fields=["hour"]),
-            models.Index(fields=["seasons"]),
             models.Index(fields=["functioning_day"]),
+            # covering indexes for _apply_filters (date range, season + date range) feeding
+            # the KPI aggregates, and for per-season GROUP BY hour (heatmap, seasonal
+            # weather means); these replace the old single-column date/hour/seasons indexes
+            models.Index(
+                fields=["date", "hour", "rented_bike_count", "temperature_c", "humidity_pct"],
+                name="hourly_date_kpi_idx",
+            ),
+            models.Index(
+                fields=["seasons", "date", "hour", "rented_bike_count", "temperature_c", "humidity_pct"],
+                name="hourly_season_date_kpi_idx",
+            ),
+            models.Index(
+                fields=[
+                    "seasons", "hour", "date", "rented_bike_count", "temperature_c",
+                    "humidity_pct", "windspeed_ms", "visibility_10m", "dew_point_c",
+                    "solar_radiation_mj_m2", "rainfall_mm", "snowfall_cm",
+                ],
+                name="hourly_season_hour_idx",
+            ),
         ]
 
     def __str__(self):
         return f"{self.date} {self.hour:02d}: {self.rented_bike_count}"
 
+class SeoulBikeDailyAggQuerySet(models.QuerySet):
+    def rolling(self, metric, window):
+        """
+        Annotate each day with trailing `window`-day stats of `metric`, computed by the
+        database over a calendar frame (RANGE BETWEEN window-1 PRECEDING AND CURRENT ROW
+        on the SQLite day number), so missing dates and season gaps shrink the window
+        instead of stretching it. Adds roll_n, roll_sum, roll_mean and roll_sumsq
+        (std is derived from these).
+        """
+        if metric not in ROLLING_METRICS:
+            raise ValueError(f"Unsupported metric {metric!r}")
+        frame = ValueRange(start=-(int(window) - 1), end=0)
+        day_number = Func(F("date"), function="julianday", output_field=FloatField())
+
+        def over(expr):
+            return Window(expr, order_by=day_number.asc(), frame=frame)
+
+        return self.order_by("date").annotate(
+            roll_n=over(Count(metric)),
+            roll_sum=over(Sum(metric)),
+            roll_mean=over(Avg(metric)),
+            roll_sumsq=over(Sum(F(metric) * F(metric))),
+        )
+
 class SeoulBikeDailyAgg(models.Model):
     date = models.DateField(primary_key=True)
 
@@ -55,5 +100,103 @@ class SeoulBikeDailyAgg(models.Model):
 
     ingested_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SeoulBikeDailyAggQuerySet.as_manager()
+
     class Meta:
         indexes = [models.Index(fields=["date"])]
+
+
+class ForecastHourly(models.Model):
+    """Hourly predictions precomputed by `materialize_forecasts` (see analytics.forecasts)."""
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    seasons = models.CharField(max_length=16)
+    holiday = models.CharField(max_length=16)
+    functioning_day = models.CharField(max_length=8)
+
+    pred = models.FloatField()
+    model_version = models.CharField(max_length=128)  # forecasts.model_version() that produced it
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("date", "seasons", "holiday", "functioning_day", "hour")
+
+
+# -----------------------
+# Optional station dimension
+# -----------------------
+# Station-hourly facts live in monthly partition tables managed by analytics.stations
+# (analytics_stationhourly_YYYYMM); the models below are the rollups endpoints read.
+class Station(models.Model):
+    station_id = models.CharField(max_length=32, primary_key=True)
+    name = models.CharField(max_length=128, default="", blank=True)
+    district = models.CharField(max_length=64, db_index=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.station_id} ({self.district})"
+
+class DistrictHourlyAgg(models.Model):
+    district = models.CharField(max_length=64)
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    rented_bike_count = models.IntegerField()
+    seasons = models.CharField(max_length=16, default="", blank=True)  # copied from SeoulBikeHourly
+
+    class Meta:
+        unique_together = ("district", "date", "hour")
+        indexes = [
+            models.Index(fields=["district", "seasons", "date", "hour", "rented_bike_count"],
+                         name="district_season_date_idx"),
+        ]
+
+class StationDailyAgg(models.Model):
+    station = models.ForeignKey(Station, on_delete=models.CASCADE)
+    date = models.DateField()
+    total_rides = models.IntegerField()
+    hours = models.PositiveSmallIntegerField()
+    seasons = models.CharField(max_length=16, default="", blank=True)
+
+    class Meta:
+        unique_together = ("station", "date")
+        indexes = [
+            models.Index(fields=["station", "seasons", "date", "total_rides", "hours"],
+                         name="station_season_date_idx"),
+        ]
+
+
+# -----------------------
+# Pipeline runs
+# -----------------------
+class PipelineJob(models.Model):
+    """One ingest → rollup → aggregate → retrain run (see analytics.pipeline)."""
+    STATUSES = [(s, s) for s in ("queued", "running", "succeeded", "failed")]
+
+    status = models.CharField(max_length=16, choices=STATUSES, default="queued")
+    params = models.JSONField(default=dict)  # csv path, target steps, force
+    triggered_by = models.CharField(max_length=150, default="", blank=True)
+    worker = models.CharField(max_length=128, default="", blank=True)  # "host:pid" that owns the run
+    error = models.TextField(default="", blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+class PipelineStep(models.Model):
+    STATUSES = [(s, s) for s in ("pending", "running", "skipped", "succeeded", "failed")]
+
+    job = models.ForeignKey(PipelineJob, on_delete=models.CASCADE, related_name="steps")
+    name = models.CharField(max_length=32)
+    status = models.CharField(max_length=16, choices=STATUSES, default="pending")
+    fingerprint = models.CharField(max_length=64, default="", blank=True)  # hash of the step's inputs
+    rows_in = models.BigIntegerField(null=True, blank=True)
+    rows_out = models.BigIntegerField(null=True, blank=True)
+    duration_s = models.FloatField(null=True, blank=True)
+    message = models.TextField(default="", blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["name", "status"], name="pipeline_step_status_idx")]
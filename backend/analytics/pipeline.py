@@ -0,0 +1,282 @@
+"""
+Local ingest → rollup → aggregate → retrain orchestration.
+
+STEPS is a small dependency DAG over the existing management commands. Right before a
+step would run (i.e. after its dependencies finished) its inputs are fingerprinted; if
+the fingerprint matches the step's last completed run and its outputs still exist, the
+step is skipped. Re-running on an unchanged CSV therefore costs one file hash and a
+couple of aggregates instead of a full re-aggregate and retrain.
+
+Jobs run on a single-worker thread pool in this process (SQLite has one writer anyway),
+so the API can trigger one without blocking the request thread. Job/step status,
+fingerprints, durations and row counts are stored in PipelineJob/PipelineStep for polling.
+Only one job may be queued or running across all processes: claim() checks the table in
+the same write transaction that creates the job, after failing jobs whose owning process
+has exited (see _is_live).
+"""
+import hashlib
+import io
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import forecasts, metrics, stations
+from .engine import ColumnarEngine
+from .models import (
+    DistrictHourlyAgg, ForecastHourly, PipelineJob, PipelineStep, SeoulBikeDailyAgg, SeoulBikeHourly,
+)
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+# -----------------------
+# Steps
+# -----------------------
+def _ingest_inputs(params):
+    path = Path(params["csv"])
+    if not path.exists():
+        raise FileNotFoundError(f"File {path} does not exist")
+    h, lines = hashlib.sha256(), 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+            lines += chunk.count(b"\n")
+    return _digest(h.hexdigest()), max(lines - 1, 0)  # minus header
+
+
+def _ingest_run(params, out):
+    # a changed CSV may only correct values for existing (date, hour) keys, so upsert
+    call_command("ingest_seoul_bike", path=params["csv"], upsert=True, stdout=out)
+    return SeoulBikeHourly.objects.count()
+
+
+def _rollup_inputs(params):
+    # which hourly rows exist and when they were last written, but not the ride sum: the
+    # rollup itself rewrites rented_bike_count, and that must not look like new input
+    version = ColumnarEngine.data_version()
+    return _digest(version[:4], stations.partitions()), version[0]
+
+
+def _rollup_run(params, out):
+    # ingest writes the CSV's city-wide counts; where station facts exist they are the
+    # source of truth, so re-derive the city/district/station series from them
+    months = stations.partitions()
+    stations.rebuild_rollups(months)
+    out.write(f"Rebuilt station rollups for {len(months)} month(s).\n")
+    return DistrictHourlyAgg.objects.count()
+
+
+def _aggregate_inputs(params):
+    version = ColumnarEngine.data_version()  # count, max id/ingested_at/updated_at, ride sum
+    return _digest(version), version[0]
+
+
+def _aggregate_run(params, out):
+    call_command("build_daily_aggregates", stdout=out)
+    return SeoulBikeDailyAgg.objects.count()
+
+
+def _retrain_run(params, out):
+    call_command("train_demand_model", stdout=out)  # also re-materializes forecasts
+    return ForecastHourly.objects.filter(model_version=forecasts.model_version()).count()
+
+
+class Step:
+    def __init__(self, name, deps, inputs, run, outputs_exist):
+        self.name = name
+        self.deps = deps
+        self.inputs = inputs                # params -> (fingerprint, rows_in)
+        self.run = run                      # (params, stdout) -> rows_out (size of the output table)
+        self.outputs_exist = outputs_exist  # () -> bool; a missing output forces a rerun
+
+
+# declared in a valid run order
+STEPS = {s.name: s for s in [
+    Step("ingest", [], _ingest_inputs, _ingest_run, lambda: SeoulBikeHourly.objects.exists()),
+    Step("rollup", ["ingest"], _rollup_inputs, _rollup_run,
+         lambda: not stations.partitions() or DistrictHourlyAgg.objects.exists()),
+    Step("aggregate", ["rollup"], _aggregate_inputs, _aggregate_run,
+         lambda: SeoulBikeDailyAgg.objects.exists()),
+    Step("retrain", ["aggregate"], _aggregate_inputs, _retrain_run,
+         lambda: forecasts.active_model_path() is not None),
+]}
+
+
+def plan(targets=None):
+    """Step names needed for `targets` (default: all), dependencies first."""
+    wanted = set()
+
+    def visit(name):
+        if name not in STEPS:
+            raise ValueError(f"Unknown pipeline step {name!r}; choose from {list(STEPS)}")
+        if name not in wanted:
+            wanted.add(name)
+            for dep in STEPS[name].deps:
+                visit(dep)
+
+    for name in targets or STEPS:
+        visit(name)
+    return [name for name in STEPS if name in wanted]
+
+
+def _last_fingerprint(name, exclude_job):
+    """Fingerprint of the step's most recent completed (run or unchanged-skip) execution."""
+    return (
+        PipelineStep.objects.filter(name=name, status__in=("succeeded", "skipped"))
+        .exclude(fingerprint="").exclude(job=exclude_job)
+        .order_by("-id").values_list("fingerprint", flat=True).first()
+    )
+
+
+# -----------------------
+# Jobs
+# -----------------------
+WORKER = f"{socket.gethostname()}:{os.getpid()}"
+_owned = set()  # ids of jobs this process has claimed and not finished running
+
+
+def _is_live(job):
+    """Whether the process that claimed `job` may still run or be running it."""
+    if job.worker == WORKER:
+        return job.pk in _owned
+    host, _, pid = job.worker.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return True  # can't probe another host; leave it to its owner
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+def fail_stale_jobs():
+    """Mark queued/running jobs whose owning process is gone as failed; returns how many."""
+    stale = [job for job in PipelineJob.objects.filter(status__in=("queued", "running")) if not _is_live(job)]
+    for job in stale:
+        job.status, job.finished_at = "failed", timezone.now()
+        job.error = f"worker {job.worker or '?'} exited before the job finished"
+        job.save(update_fields=["status", "error", "finished_at"])
+        job.steps.filter(status="running").update(status="failed", message="worker exited")
+        job.steps.filter(status="pending").update(status="skipped", message="worker exited")
+    return len(stale)
+
+
+def create_job(targets=None, csv=None, force=False, triggered_by=""):
+    params = {"csv": str(csv or settings.ANALYTICS_PIPELINE_CSV), "steps": plan(targets), "force": bool(force)}
+    job = PipelineJob.objects.create(params=params, triggered_by=triggered_by, worker=WORKER)
+    PipelineStep.objects.bulk_create([PipelineStep(job=job, name=name) for name in params["steps"]])
+    _owned.add(job.pk)
+    return job
+
+
+def claim(targets=None, csv=None, force=False, triggered_by=""):
+    """
+    Create a job unless one is already queued or running in any process. Returns
+    (job, created); when not created, `job` is the active one.
+    """
+    targets = plan(targets)  # validate before taking the write lock
+    with transaction.atomic():  # BEGIN IMMEDIATE: the check and the insert share one write lock
+        fail_stale_jobs()
+        active = PipelineJob.objects.filter(status__in=("queued", "running")).first()
+        if active is not None:
+            return active, False
+        return create_job(targets, csv=csv, force=force, triggered_by=triggered_by), True
+
+
+@metrics.track("pipeline")
+def run(job_id, stdout=None):
+    """Execute a queued job's steps in order on the calling thread; returns the job."""
+    try:
+        return _run(job_id, stdout)
+    finally:
+        _owned.discard(job_id)
+
+
+def _run(job_id, stdout):
+    job = PipelineJob.objects.get(pk=job_id)
+    job.status, job.started_at = "running", timezone.now()
+    job.save(update_fields=["status", "started_at"])
+    out = stdout or io.StringIO()
+    failed = None
+
+    for row in job.steps.all():
+        step = STEPS[row.name]
+        if failed:
+            row.status, row.message = "skipped", f"upstream step {failed!r} failed"
+            row.save(update_fields=["status", "message"])
+            continue
+
+        row.status = "running"
+        row.save(update_fields=["status"])
+        t0 = time.perf_counter()
+        try:
+            with metrics.timer(f"step:{step.name}"):
+                row.fingerprint, row.rows_in = step.inputs(job.params)
+                unchanged = row.fingerprint == _last_fingerprint(step.name, job) and step.outputs_exist()
+                if unchanged and not job.params.get("force"):
+                    row.status, row.message = "skipped", "inputs unchanged"
+                else:
+                    row.rows_out = step.run(job.params, out)
+                    row.status = "succeeded"
+        except (Exception, SystemExit) as exc:  # commands signal bad input via SystemExit
+            row.status, row.message = "failed", str(exc) or exc.__class__.__name__
+            failed = step.name
+        row.duration_s = round(time.perf_counter() - t0, 3)
+        row.save()
+
+    job.status = "failed" if failed else "succeeded"
+    job.error = f"step {failed!r} failed" if failed else ""
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+    return job
+
+
+# -----------------------
+# Background runner
+# -----------------------
+_executor = None
+_lock = threading.Lock()
+_current = {"job_id": None, "future": None}
+
+
+def _run_in_worker(job_id):
+    try:
+        return run(job_id)
+    finally:
+        connections.close_all()  # the worker thread owns its own DB connections
+
+
+def start(targets=None, csv=None, force=False, triggered_by=""):
+    """
+    Claim a job and queue it on the background worker, unless one is already queued or
+    running (in this or another process). Returns (job, started).
+    """
+    global _executor
+    with _lock:
+        job, created = claim(targets, csv=csv, force=force, triggered_by=triggered_by)
+        if not created:
+            return job, False
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics-pipeline")
+        _current.update(job_id=job.pk, future=_executor.submit(_run_in_worker, job.pk))
+    return job, True
+
+
+def wait(timeout=None):
+    """Block until the active job (if any) finishes (tests use this)."""
+    future = _current["future"]
+    if future is not None:
+        future.result(timeout)
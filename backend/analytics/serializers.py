@@ -1,9 +1,19 @@
 from rest_framework import serializers
-from .models import SeoulBikeHourly, SeoulBikeDailyAgg
+from . import metrics
+from .models import PipelineJob, PipelineStep, SeoulBikeHourly, SeoulBikeDailyAgg
+
+class InstrumentedListSerializer(serializers.ListSerializer):
+    """Records serialize time and row count for list endpoints."""
+    def to_representation(self, data):
+        with metrics.timer("serialize"):
+            out = super().to_representation(data)
+        metrics.rows_serialized(len(out))
+        return out
 
 class SeoulBikeHourlySerializer(serializers.ModelSerializer):
     class Meta:
         model = SeoulBikeHourly
+        list_serializer_class = InstrumentedListSerializer
         fields = [
             "date","hour","rented_bike_count","temperature_c","humidity_pct",
             "windspeed_ms","visibility_10m","dew_point_c","solar_radiation_mj_m2",
@@ -13,7 +23,23 @@ class SeoulBikeHourlySerializer(serializers.ModelSerializer):
 class SeoulBikeDailyAggSerializer(serializers.ModelSerializer):
     class Meta:
         model = SeoulBikeDailyAgg
+        list_serializer_class = InstrumentedListSerializer
         fields = [
             "date","total_rides","avg_temp_c","avg_humidity_pct","avg_windspeed_ms",
             "roll7_total","roll30_total","seasons_mode","holiday_any","functioning_all_yes"
         ]
+
+class PipelineStepSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PipelineStep
+        fields = ["name","status","fingerprint","rows_in","rows_out","duration_s","message"]
+
+class PipelineJobSerializer(serializers.ModelSerializer):
+    steps = PipelineStepSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = PipelineJob
+        fields = [
+            "id","status","params","triggered_by","error",
+            "created_at","started_at","finished_at","steps"
+        ]
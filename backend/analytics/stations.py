@@ -0,0 +1,206 @@
+"""
+Station-hourly fact storage and rollups.
+
+Facts (station_id, date, hour, rented_bike_count) are ~1,500x the city-wide series, so
+they are kept out of the ORM in one SQLite table per month (analytics_stationhourly_YYYYMM,
+clustered on station_id/date/hour). Endpoints never scan them for city or district
+questions; instead each ingested month is rolled up into:
+
+  - SeoulBikeHourly.rented_bike_count   city-wide sum per (date, hour)
+  - DistrictHourlyAgg                   per (district, date, hour)
+  - StationDailyAgg                     per (station, date)
+
+Only the per-station heatmap reads facts, and then just one station's rows in the
+months overlapping the requested range.
+
+The city series is only rewritten where both sides exist: a fact hour with no
+SeoulBikeHourly row (its weather comes from the CSV ingest) can't enter it, and a city
+hour with no facts keeps its ingested count. Either case is logged per month, since a
+partially covered month mixes station-derived and CSV counts.
+"""
+import logging
+import re
+from datetime import date
+
+from django.db import connection, transaction
+
+from .engine import engine
+from .models import DistrictHourlyAgg, SeoulBikeHourly, Station, StationDailyAgg
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "analytics_stationhourly_"
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
+
+def partition_name(year, month):
+    return f"{PARTITION_PREFIX}{year:04d}{month:02d}"
+
+
+def _month_bounds(year, month):
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+
+def partitions():
+    """Existing partitions as sorted [(year, month), ...]."""
+    out = []
+    for table in connection.introspection.table_names():
+        m = _PARTITION_RE.match(table)
+        if m:
+            out.append((int(m.group(1)), int(m.group(2))))
+    return sorted(out)
+
+
+def partitions_between(start=None, end=None):
+    """Partitions whose month overlaps [start, end] (either bound optional)."""
+    out = []
+    for year, month in partitions():
+        lo, hi = _month_bounds(year, month)
+        if (start is None or hi > start) and (end is None or lo <= end):
+            out.append((year, month))
+    return out
+
+
+def ensure_partition(year, month):
+    name = partition_name(year, month)
+    with connection.cursor() as cur:
+        cur.execute(
+            f'CREATE TABLE IF NOT EXISTS "{name}" ('
+            "station_id varchar(32) NOT NULL, date date NOT NULL, hour smallint NOT NULL, "
+            "rented_bike_count integer NOT NULL, PRIMARY KEY (station_id, date, hour)"
+            ") WITHOUT ROWID"
+        )
+    return name
+
+
+def write_facts(df):
+    """
+    Upsert a DataFrame of station_id/date/hour/rented_bike_count into its monthly
+    partitions. Returns the set of (year, month) touched.
+
+    Rows for stations missing from the Station dimension are rejected (and logged):
+    rollups join on Station, so they would otherwise sit in the partitions without
+    reaching any rollup, including the city-wide series.
+    """
+    df = df.assign(station_id=df["station_id"].astype(str))
+    known = df["station_id"].isin(set(Station.objects.filter(
+        station_id__in=df["station_id"].unique().tolist()
+    ).values_list("station_id", flat=True)))
+    if not known.all():
+        unknown = df.loc[~known, "station_id"]
+        logger.warning("Rejected %d station-hourly rows for %d unknown station(s): %s",
+                       len(unknown), unknown.nunique(), ", ".join(sorted(unknown.unique())[:10]))
+        df = df[known]
+
+    touched = set()
+    months = df["date"].map(lambda d: (d.year, d.month))
+    for (year, month), part in df.groupby(months):
+        name = ensure_partition(year, month)
+        rows = list(zip(
+            part["station_id"].astype(str),
+            part["date"].map(date.isoformat),
+            part["hour"].astype(int),
+            part["rented_bike_count"].astype(int),
+        ))
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.executemany(
+                f'INSERT OR REPLACE INTO "{name}" (station_id, date, hour, rented_bike_count) VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+        touched.add((year, month))
+    return touched
+
+
+def rebuild_rollups(months):
+    """
+    Recompute city, district and station rollups for the given (year, month)s. Returns
+    {(year, month): (fact hours without a city row, city hours without facts)}.
+    """
+    city = SeoulBikeHourly._meta.db_table
+    district = DistrictHourlyAgg._meta.db_table
+    station_daily = StationDailyAgg._meta.db_table
+    station = Station._meta.db_table
+    coverage = {}
+
+    for year, month in sorted(months):
+        facts = partition_name(year, month)
+        lo, hi = _month_bounds(year, month)
+        lo, hi = lo.isoformat(), hi.isoformat()
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.execute(f'DELETE FROM "{district}" WHERE date >= %s AND date < %s', [lo, hi])
+            cur.execute(
+                f'INSERT INTO "{district}" (district, date, hour, rented_bike_count, seasons) '
+                f'SELECT s.district, f.date, f.hour, SUM(f.rented_bike_count), COALESCE(c.seasons, \'\') '
+                f'FROM "{facts}" f JOIN "{station}" s ON s.station_id = f.station_id '
+                f'LEFT JOIN "{city}" c ON c.date = f.date AND c.hour = f.hour '
+                f"GROUP BY s.district, f.date, f.hour"
+            )
+            cur.execute(f'DELETE FROM "{station_daily}" WHERE date >= %s AND date < %s', [lo, hi])
+            cur.execute(
+                f'INSERT INTO "{station_daily}" (station_id, date, total_rides, hours, seasons) '
+                f'SELECT f.station_id, f.date, SUM(f.rented_bike_count), COUNT(*), '
+                f"COALESCE((SELECT c.seasons FROM \"{city}\" c WHERE c.date = f.date LIMIT 1), '') "
+                f'FROM "{facts}" f JOIN "{station}" s ON s.station_id = f.station_id '
+                f"GROUP BY f.station_id, f.date"
+            )
+            # city-wide series is the sum over districts (i.e. stations); weather columns
+            # stay as ingested. UPDATE ... FROM needs SQLite >= 3.33.
+            cur.execute(
+                f'UPDATE "{city}" SET rented_bike_count = agg.n FROM ('
+                f'SELECT date, hour, SUM(rented_bike_count) AS n FROM "{district}" '
+                f"WHERE date >= %s AND date < %s GROUP BY date, hour"
+                f') AS agg WHERE "{city}".date = agg.date AND "{city}".hour = agg.hour',
+                [lo, hi],
+            )
+            cur.execute(
+                f'SELECT COUNT(*) FROM (SELECT DISTINCT date, hour FROM "{district}" d '
+                f"WHERE date >= %s AND date < %s AND NOT EXISTS ("
+                f'SELECT 1 FROM "{city}" c WHERE c.date = d.date AND c.hour = d.hour))',
+                [lo, hi],
+            )
+            orphaned = cur.fetchone()[0]
+            cur.execute(
+                f'SELECT COUNT(*) FROM "{city}" c WHERE date >= %s AND date < %s AND NOT EXISTS ('
+                f'SELECT 1 FROM "{district}" d WHERE d.date = c.date AND d.hour = c.hour)',
+                [lo, hi],
+            )
+            uncovered = cur.fetchone()[0]
+        if orphaned:
+            logger.warning("%04d-%02d: %d station-fact hour(s) have no city row and are left out of the "
+                           "city series; ingest the city CSV for those dates", year, month, orphaned)
+        if uncovered:
+            logger.warning("%04d-%02d: %d city hour(s) have no station facts and keep their ingested "
+                           "counts, so the month mixes station-derived and CSV counts", year, month, uncovered)
+        coverage[(year, month)] = (orphaned, uncovered)
+    # rented_bike_count changed in place; don't wait for the engine's periodic version check
+    engine.invalidate()
+    return coverage
+
+
+def station_hourly(station_id, start=None, end=None, season=None):
+    """
+    (date, hour, rented_bike_count) rows for one station, reading only the partitions
+    overlapping [start, end] via their (station_id, date, hour) primary key.
+    """
+    city = SeoulBikeHourly._meta.db_table
+    rows = []
+    with connection.cursor() as cur:
+        for year, month in partitions_between(start, end):
+            sql = f'SELECT f.date, f.hour, f.rented_bike_count FROM "{partition_name(year, month)}" f'
+            params = [station_id]
+            where = ["f.station_id = %s"]
+            if start:
+                where.append("f.date >= %s")
+                params.append(start.isoformat())
+            if end:
+                where.append("f.date <= %s")
+                params.append(end.isoformat())
+            if season:
+                sql += f' JOIN "{city}" c ON c.date = f.date AND c.hour = f.hour'
+                where.append("c.seasons = %s")
+                params.append(season)
+            cur.execute(f"{sql} WHERE {' AND '.join(where)}", params)
+            rows.extend(cur.fetchall())
+    return rows
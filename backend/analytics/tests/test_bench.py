@@ -0,0 +1,65 @@
+from django.test import SimpleTestCase
+from analytics.management.commands.bench import synthesize, compare
+import pandas as pd
+
+class BenchHelpersTests(SimpleTestCase):
+    def _src(self):
+        return pd.DataFrame({
+            "Date": ["01/12/2017", "01/12/2017", "02/12/2017", "02/12/2017"],
+            "Rented Bike Count": [254, 204, 300, 0],
+            "Hour": [0, 1, 0, 1],
+            "Temperature(°C)": [-5.2, -5.5, -3.0, -2.0],
+            "Humidity(%)": [37, 38, 99, 100],
+            "Seasons": ["Winter"] * 4,
+            "Holiday": ["No Holiday"] * 4,
+            "Functioning Day": ["Yes"] * 4,
+        })
+
+    def test_synthesize_scales_with_unique_keys(self):
+        src = self._src()
+        out = synthesize(src, 3)
+        self.assertEqual(len(out), 12)
+        self.assertEqual(list(out.columns), list(src.columns))
+        self.assertFalse(out.duplicated(["Date", "Hour"]).any())
+        # replica 0 is the source year unchanged; later replicas stay in range
+        pd.testing.assert_frame_equal(out.iloc[:4].reset_index(drop=True), src, check_dtype=False)
+        self.assertTrue(out["Humidity(%)"].between(0, 100).all())
+        self.assertTrue((out["Rented Bike Count"] >= 0).all())
+        self.assertEqual(out["Date"].iloc[-1], "06/12/2017")
+
+    def test_compare_flags_slowdowns_only(self):
+        def doc(ingest, p95):
+            return {"scales": {"1": {
+                "steps": {"ingest_seoul_bike": {"seconds": ingest}},
+                "api": {"kpis/basic": {"cold": {"p95_ms": p95}, "warm": {"p95_ms": 1.0}}},
+            }}}
+        baseline = doc(1.0, 10.0)
+        self.assertEqual(compare(doc(1.1, 5.0), baseline), [])
+        flagged = [key for key, *_ in compare(doc(2.0, 20.0), baseline)]
+        self.assertEqual(flagged, ["1x/steps/ingest_seoul_bike/seconds", "1x/api/kpis/basic/cold/p95_ms"])
+
+    def test_compare_flags_errors_and_status_changes(self):
+        baseline = {"scales": {"1": {
+            "steps": {"ingest_seoul_bike": {"seconds": 1.0}},
+            "api": {"predict/day": {"status": 200, "cold": {"p95_ms": 5.0}, "warm": {"p95_ms": 1.0}}},
+        }}}
+        current = {"scales": {"1": {
+            "steps": {"ingest_seoul_bike": {"error": "SystemExit: boom"}},
+            "api": {"predict/day": {"status": 500, "cold": {"p95_ms": 5.0}, "warm": {"p95_ms": 1.0}}},
+        }}}
+        self.assertEqual(compare(current, baseline), [
+            ("1x/steps/ingest_seoul_bike/seconds", 1.0, "SystemExit: boom", None),
+            ("1x/api/predict/day/status", 200, 500, None),
+        ])
+
+        # skipped endpoints and sections not run this time aren't regressions
+        current = {"scales": {"1": {
+            "steps": {"ingest_seoul_bike": {"seconds": 1.0}},
+            "api": {"predict/day": {"skipped": "no model"}},
+        }}}
+        self.assertEqual(compare(current, baseline), [])
+        api_only = {"meta": {"steps": ["api"]}, "scales": {"1": {"api": baseline["scales"]["1"]["api"]}}}
+        self.assertEqual(compare(api_only, baseline), [])
+        # ...but a requested step that left no timing is
+        api_only["meta"]["steps"].append("ingest_seoul_bike")
+        self.assertEqual(compare(api_only, baseline), [("1x/steps/ingest_seoul_bike/seconds", 1.0, None, None)])
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from analytics import forecasts
+from pathlib import Path
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Generous ceilings: they catch a heavy import sneaking back onto the boot/request path,
+# not machine-to-machine noise. The first request includes loading the model (joblib/sklearn).
+IMPORT_BUDGET_SECONDS = 3.0
+FIRST_REQUEST_BUDGET_SECONDS = 5.0
+
+# Runs in a fresh interpreter: boot is timed, then a throwaway in-memory database is
+# migrated and seeded (untimed), then the first predict/day is timed.
+COLD_SCRIPT = """
+import json, os, sys, time
+from pathlib import Path
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+t0 = time.perf_counter()
+import django
+django.setup()
+import analytics.urls
+boot = time.perf_counter() - t0
+loaded_at_boot = sorted(m for m in ("pandas", "sklearn", "joblib") if m in sys.modules)
+
+from datetime import date
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from analytics import forecasts
+from analytics.models import SeoulBikeHourly
+setup_test_environment()
+connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+SeoulBikeHourly.objects.bulk_create([
+    SeoulBikeHourly(date=date(2018, 1, 1), hour=h, rented_bike_count=10, temperature_c=1.0,
+                    humidity_pct=50, windspeed_ms=1.0, visibility_10m=2000, dew_point_c=-1.0,
+                    solar_radiation_mj_m2=0.0, rainfall_mm=0.0, snowfall_cm=0.0, seasons="Winter",
+                    holiday="No Holiday", functioning_day="Yes")
+    for h in range(24)
+])
+forecasts.MODELS_DIR = Path(os.environ["COLD_MODELS_DIR"])
+
+client = Client()
+t0 = time.perf_counter()
+day = client.post("/api/v1/predict/day", content_type="application/json", data={
+    "date": "2018-01-15", "seasons": "Winter", "holiday": "No Holiday", "functioning_day": "Yes",
+})
+first_request = time.perf_counter() - t0
+
+# sklearn imports pandas itself, so instead check no DataFrame is built on either path
+import pandas as pd
+class NoFrames(pd.DataFrame):
+    def __init__(self, *args, **kwargs):
+        raise AssertionError("DataFrame built on the prediction path")
+pd.DataFrame = NoFrames
+day_again = client.post("/api/v1/predict/day", content_type="application/json", data={
+    "date": "2018-01-16", "seasons": "Winter", "holiday": "No Holiday", "functioning_day": "Yes",
+})
+hour = client.post("/api/v1/predict/hour", content_type="application/json", data={
+    "date": "2018-01-15", "hour": 8, "seasons": "Winter", "holiday": "No Holiday",
+    "functioning_day": "Yes", "temperature_c": 1.0, "humidity_pct": 50, "windspeed_ms": 1.0,
+    "visibility_10m": 2000, "dew_point_c": -1.0, "solar_radiation_mj_m2": 0.0,
+    "rainfall_mm": 0.0, "snowfall_cm": 0.0,
+})
+print(json.dumps({
+    "boot_seconds": boot, "loaded_at_boot": loaded_at_boot, "first_request_seconds": first_request,
+    "statuses": [day.status_code, day_again.status_code, hour.status_code], "day_pred": day.json().get("pred"),
+}))
+"""
+
+def write_numeric_model(path):
+    """A model with feature_names_in_ like train_demand_model's, without needing pandas."""
+    import joblib
+    import numpy as np
+    from sklearn.dummy import DummyRegressor
+    cols = ["hour_sin", "hour_cos", *forecasts.WEATHER_FIELDS, "season", "is_holiday"]
+    model = DummyRegressor(strategy="constant", constant=5).fit(np.zeros((1, len(cols))), [5])
+    model.feature_names_in_ = np.array(cols, dtype=object)
+    joblib.dump(model, path)
+
+class ColdStartTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with tempfile.TemporaryDirectory() as tmp:
+            write_numeric_model(Path(tmp) / "model_v2.joblib")
+            env = {**os.environ, "ANALYTICS_WARMUP": "", "COLD_MODELS_DIR": tmp}
+            out = subprocess.run([sys.executable, "-c", COLD_SCRIPT], cwd=settings.BASE_DIR, env=env,
+                                 capture_output=True, text=True)
+        if out.returncode:
+            raise AssertionError(out.stderr)
+        cls.result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    def test_boot_import_budget_and_no_model_stack(self):
+        self.assertEqual(self.result["loaded_at_boot"], [])
+        self.assertLess(self.result["boot_seconds"], IMPORT_BUDGET_SECONDS)
+
+    def test_first_request_budget_without_dataframes(self):
+        self.assertEqual(self.result["statuses"], [200, 200, 200])
+        self.assertEqual(self.result["day_pred"], [5.0] * 24)
+        self.assertLess(self.result["first_request_seconds"], FIRST_REQUEST_BUDGET_SECONDS)
+
+class PredictDateTests(TestCase):
+    def test_invalid_date_rejected(self):
+        r = self.client.post("/api/v1/predict/day", content_type="application/json", data={
+            "date": "2018-13-45", "seasons": "Winter", "holiday": "No Holiday", "functioning_day": "Yes",
+        })
+        self.assertEqual(r.status_code, 400)
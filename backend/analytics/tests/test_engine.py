@@ -0,0 +1,77 @@
+from django.apps import apps
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from unittest import mock
+from analytics import forecasts
+from analytics.engine import engine
+from analytics.models import SeoulBikeHourly
+from datetime import date, timedelta
+
+class ColumnarEngineTests(TestCase):
+    """The columnar engine must agree with the ORM path."""
+
+    @classmethod
+    def setUpTestData(cls):
+        d0 = date(2018, 2, 25)
+        SeoulBikeHourly.objects.bulk_create([
+            SeoulBikeHourly(
+                date=d0 + timedelta(days=d), hour=h, rented_bike_count=(d * 37 + h * 11) % 500,
+                temperature_c=-2.0 + d * 0.5 + h * 0.1, humidity_pct=40 + h, windspeed_ms=1.5,
+                visibility_10m=2000, dew_point_c=-5.0, solar_radiation_mj_m2=0.1 * (h % 6),
+                rainfall_mm=0.5 if h == 3 else 0.0, snowfall_cm=0.0,
+                seasons="Winter" if d < 4 else "Spring",
+                holiday="No Holiday", functioning_day="Yes",
+            )
+            for d in range(9) for h in range(24)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        engine.invalidate()
+
+    def _both(self, url):
+        sep = "&" if "?" in url else "?"
+        orm = self.client.get(f"{url}{sep}engine=orm").json()
+        col = self.client.get(f"{url}{sep}engine=columnar").json()
+        return orm, col
+
+    def test_kpis_basic_matches_orm(self):
+        for qs in ["", "?season=Winter", "?start=2018-02-27&end=2018-03-02", "?season=Summer"]:
+            orm, col = self._both("/api/v1/kpis/basic" + qs)
+            self.assertEqual(orm["rows"], col["rows"])
+            self.assertEqual(orm["total_rides"], col["total_rides"])
+            for k in ["avg_temp_c", "avg_humidity_pct", "avg_rides_per_hour"]:
+                self.assertAlmostEqual(orm[k], col[k], places=1)
+
+    def test_heatmap_matches_orm(self):
+        for qs in ["", "?season=Spring&start=2018-03-01"]:
+            orm, col = self._both("/api/v1/kpis/hourly-heatmap" + qs)
+            for orm_row, col_row in zip(orm["matrix"], col["matrix"]):
+                for a, b in zip(orm_row, col_row):
+                    self.assertAlmostEqual(a, b, places=1)
+
+    def test_seasonal_weather_matches_orm(self):
+        orm = forecasts.seasonal_hourly_weather("Winter")
+        col = engine.refresh().seasonal_hourly_weather("Winter")
+        self.assertEqual(sorted(orm), sorted(col))
+        for h in orm:
+            self.assertAlmostEqual(orm[h]["temperature_c"], col[h]["temperature_c"], places=4)
+            self.assertAlmostEqual(orm[h]["rainfall_mm"], col[h]["rainfall_mm"], places=4)
+
+    def test_reloads_on_new_data(self):
+        with mock.patch("analytics.engine.VERSION_CHECK_SECONDS", 0):
+            n = engine.refresh().n
+            SeoulBikeHourly.objects.filter(date=date(2018, 2, 25)).delete()
+            self.assertEqual(engine.refresh().n, n - 24)
+
+    def test_warmup_preloads_when_columnar_endpoints_enabled(self):
+        config = apps.get_app_config("analytics")
+        with mock.patch("analytics.forecasts.warmup"), mock.patch.object(engine, "preload") as preload:
+            for endpoints, calls in [([], 0), (["kpis_basic"], 1)]:
+                with override_settings(ANALYTICS_WARMUP=True, ANALYTICS_COLUMNAR_ENDPOINTS=endpoints):
+                    config.ready()
+                self.assertEqual(preload.call_count, calls)
+
+        with mock.patch.object(engine, "refresh") as refresh:
+            engine.preload().join(10)
+        refresh.assert_called_once_with(force=True)
@@ -0,0 +1,60 @@
+from django.core.management import call_command
+from django.test import TestCase
+from analytics import forecasts
+from analytics.models import SeoulBikeHourly, ForecastHourly
+from datetime import date
+from io import StringIO
+from pathlib import Path
+from sklearn.dummy import DummyRegressor
+from unittest import mock
+import joblib
+import os
+import tempfile
+
+class MaterializedForecastTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for h in range(24):
+            SeoulBikeHourly.objects.create(
+                date=date(2018,1,1), hour=h, rented_bike_count=10,
+                temperature_c=1.0, humidity_pct=50, windspeed_ms=1.0,
+                visibility_10m=2000, dew_point_c=-1.0, solar_radiation_mj_m2=0.0,
+                rainfall_mm=0.0, snowfall_cm=0.0, seasons="Winter",
+                holiday="No Holiday", functioning_day="Yes"
+            )
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = Path(tmp.name)
+        patcher = mock.patch.object(forecasts, "MODELS_DIR", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.promote(42)
+
+    def promote(self, constant):
+        path = self.store / "model_v2.joblib"
+        joblib.dump(DummyRegressor(strategy="constant", constant=constant).fit([[0]], [constant]), path)
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + constant))  # distinct version per promotion
+
+    def predict_day(self):
+        return self.client.post("/api/v1/predict/day", content_type="application/json", data={
+            "date": "2018-01-15", "seasons": "Winter", "holiday": "No Holiday", "functioning_day": "Yes",
+        }).json()
+
+    def test_materialize_all_flag_combinations(self):
+        call_command("materialize_forecasts", start="2018-01-15", days=3, stdout=StringIO())
+        self.assertEqual(ForecastHourly.objects.count(), 3 * 2 * 2 * 24)
+        self.assertEqual(set(ForecastHourly.objects.values_list("model_version", flat=True)),
+                         {forecasts.model_version()})
+
+    def test_predict_day_serves_current_rows_and_falls_back_when_stale(self):
+        self.assertEqual(self.predict_day()["source"], "live")
+        call_command("materialize_forecasts", start="2018-01-15", days=1, stdout=StringIO())
+        r = self.predict_day()
+        self.assertEqual((r["source"], r["pred"]), ("materialized", [42.0] * 24))
+
+        self.promote(7)   # new model: stored rows no longer current
+        r = self.predict_day()
+        self.assertEqual((r["source"], r["pred"]), ("live", [7.0] * 24))
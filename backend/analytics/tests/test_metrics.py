@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from analytics.metrics import registry, track
+from analytics.models import SeoulBikeHourly
+from datetime import date
+import tempfile
+from pathlib import Path
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SeoulBikeHourly.objects.create(
+            date=date(2018,1,1), hour=0, rented_bike_count=10,
+            temperature_c=1.0, humidity_pct=50, windspeed_ms=1.0,
+            visibility_10m=2000, dew_point_c=-1.0, solar_radiation_mj_m2=0.0,
+            rainfall_mm=0.0, snowfall_cm=0.0, seasons="Winter",
+            holiday="No Holiday", functioning_day="Yes"
+        )
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def _metrics(self):
+        r = self.client.get("/api/v1/metrics")
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r["Content-Type"].startswith("text/plain"))
+        return r.content.decode()
+
+    def test_request_sql_and_cache_metrics(self):
+        self.client.get("/api/v1/kpis/basic")
+        self.client.get("/api/v1/kpis/basic")   # served by cache_page
+        text = self._metrics()
+        self.assertIn('analytics_request_seconds_count{endpoint="/api/v1/kpis/basic",method="GET"} 2', text)
+        self.assertIn('analytics_requests_total{endpoint="/api/v1/kpis/basic",method="GET",status="200"} 2', text)
+        self.assertIn('analytics_sql_queries_total{endpoint="/api/v1/kpis/basic"} 1', text)
+        # one lookup per request, although cache_page reads two keys on a hit
+        self.assertIn('analytics_cache_requests_total{endpoint="/api/v1/kpis/basic",result="hit"} 1\n', text)
+        self.assertIn('analytics_cache_requests_total{endpoint="/api/v1/kpis/basic",result="miss"} 1\n', text)
+
+    def test_nested_scopes_count_each_query_once_per_scope(self):
+        with track("outer"):
+            with track("inner"):
+                SeoulBikeHourly.objects.count()
+            SeoulBikeHourly.objects.count()
+        text = registry.render()
+        self.assertIn('analytics_sql_queries_total{endpoint="inner"} 1\n', text)
+        self.assertIn('analytics_sql_queries_total{endpoint="outer"} 2\n', text)
+
+    def test_rows_serialized(self):
+        self.client.get("/api/v1/hourly/")
+        text = self._metrics()
+        self.assertIn('analytics_rows_serialized_total{endpoint="/api/v1/hourly/"} 1', text)
+        self.assertIn('analytics_stage_seconds_count{endpoint="/api/v1/hourly/",stage="serialize"} 1', text)
+
+    def test_detail_route_label_keeps_character_class(self):
+        pk = SeoulBikeHourly.objects.get().pk
+        self.assertEqual(self.client.get(f"/api/v1/hourly/{pk}/").status_code, 200)
+        self.assertIn('analytics_requests_total{endpoint="/api/v1/hourly/(?P<pk>[^/.]+)/",method="GET",status="200"} 1',
+                      self._metrics())
+
+    def test_profile_header(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(ANALYTICS_PROFILE_DIR=tmp):
+            r = self.client.get("/api/v1/kpis/basic", HTTP_X_PROFILE="1")
+            self.assertTrue((Path(tmp) / r["X-Profile-Dump"]).exists())
+            r = self.client.get("/api/v1/meta/date-bounds")
+            self.assertFalse(r.has_header("X-Profile-Dump"))
@@ -0,0 +1,221 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from analytics import forecasts, pipeline, stations
+from analytics.models import DistrictHourlyAgg, PipelineJob, SeoulBikeDailyAgg, SeoulBikeHourly, Station
+from datetime import date
+from io import StringIO
+from pathlib import Path
+from sklearn.dummy import DummyRegressor
+from unittest import mock
+import os
+import pandas as pd
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+
+HEADER = ("Date,Rented Bike Count,Hour,Temperature(°C),Humidity(%),Wind speed (m/s),Visibility (10m),"
+          "Dew point temperature(°C),Solar Radiation (MJ/m2),Rainfall(mm),Snowfall (cm),Seasons,Holiday,Functioning Day")
+
+def write_csv(path, days, temperature=-2.0):
+    lines = [HEADER]
+    for d in days:
+        for h in range(24):
+            lines.append(f"{d:02d}/01/2018,{100 + 5 * h + d},{h},{temperature},40,1.5,2000,-10.0,0,0,0,Winter,No Holiday,Yes")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+class PipelineCommandTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.csv = Path(tmp.name) / "SeoulBikeData.csv"
+        write_csv(self.csv, [1, 2])
+        patcher = mock.patch.object(forecasts, "MODELS_DIR", Path(tmp.name) / "models_store")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_pipeline(self, **opts):
+        call_command("run_pipeline", csv=str(self.csv), stdout=StringIO(), **opts)
+        job = PipelineJob.objects.first()
+        return {s.name: s for s in job.steps.all()}
+
+    def test_plan_includes_dependencies_in_order(self):
+        self.assertEqual(pipeline.plan(["retrain"]), ["ingest", "rollup", "aggregate", "retrain"])
+        self.assertEqual(pipeline.plan(["ingest"]), ["ingest"])
+        with self.assertRaises(ValueError):
+            pipeline.plan(["deploy"])
+
+    def test_unchanged_inputs_are_skipped(self):
+        steps = self.run_pipeline(steps=["aggregate"])
+        self.assertEqual({s.status for s in steps.values()}, {"succeeded"})
+        self.assertEqual((steps["ingest"].rows_in, steps["ingest"].rows_out), (48, 48))
+        self.assertEqual((steps["aggregate"].rows_in, steps["aggregate"].rows_out), (48, 2))
+        self.assertTrue(all(s.duration_s is not None and s.fingerprint for s in steps.values()))
+
+        steps = self.run_pipeline(steps=["aggregate"])
+        self.assertEqual({s.status for s in steps.values()}, {"skipped"})
+
+        # CSV with an extra day: ingest adds rows, so aggregate's input changes too
+        write_csv(self.csv, [1, 2, 3])
+        steps = self.run_pipeline(steps=["aggregate"])
+        self.assertEqual(steps["ingest"].rows_out, 72)
+        self.assertEqual((steps["aggregate"].status, steps["aggregate"].rows_out), ("succeeded", 3))
+
+    def test_corrected_values_are_upserted(self):
+        self.run_pipeline(steps=["aggregate"])
+        write_csv(self.csv, [1, 2], temperature=4.0)   # same (date, hour) keys, new values
+        steps = self.run_pipeline(steps=["aggregate"])
+        self.assertEqual((steps["ingest"].status, steps["ingest"].rows_out), ("succeeded", 48))
+        self.assertEqual(set(SeoulBikeHourly.objects.values_list("temperature_c", flat=True)), {4.0})
+        self.assertEqual(steps["aggregate"].status, "succeeded")
+        self.assertEqual(set(SeoulBikeDailyAgg.objects.values_list("avg_temp_c", flat=True)), {4.0})
+
+    def test_reingest_keeps_station_derived_counts(self):
+        self.run_pipeline(steps=["aggregate"])
+        Station.objects.create(station_id="101", district="Mapo-gu")
+        facts = pd.DataFrame([("101", date(2018, 1, d), h, 7) for d in (1, 2) for h in range(24)],
+                             columns=["station_id", "date", "hour", "rented_bike_count"])
+        stations.rebuild_rollups(stations.write_facts(facts))
+
+        write_csv(self.csv, [1, 2], temperature=4.0)   # CSV correction re-ingests city counts
+        steps = self.run_pipeline(steps=["aggregate"])
+        self.assertEqual([steps[n].status for n in ("ingest", "rollup", "aggregate")], ["succeeded"] * 3)
+        self.assertEqual(set(SeoulBikeHourly.objects.values_list("rented_bike_count", "temperature_c")), {(7, 4.0)})
+        self.assertEqual(set(DistrictHourlyAgg.objects.values_list("rented_bike_count", flat=True)), {7})
+        self.assertEqual(set(SeoulBikeDailyAgg.objects.values_list("total_rides", flat=True)), {7 * 24})
+
+        steps = self.run_pipeline(steps=["aggregate"])
+        self.assertEqual({s.status for s in steps.values()}, {"skipped"})
+
+    def test_emptied_hourly_table_reingests(self):
+        self.run_pipeline(steps=["aggregate"])
+        SeoulBikeHourly.objects.all().delete()
+        steps = self.run_pipeline(steps=["aggregate"])
+        self.assertEqual((steps["ingest"].status, steps["ingest"].rows_out), ("succeeded", 48))
+        self.assertEqual(SeoulBikeHourly.objects.count(), 48)
+
+    def test_missing_output_and_force_rerun(self):
+        self.run_pipeline(steps=["aggregate"])
+        SeoulBikeDailyAgg.objects.all().delete()
+        steps = self.run_pipeline(steps=["aggregate"])
+        self.assertEqual((steps["ingest"].status, steps["aggregate"].status), ("skipped", "succeeded"))
+
+        steps = self.run_pipeline(steps=["aggregate"], force=True)
+        self.assertEqual({s.status for s in steps.values()}, {"succeeded"})
+
+    def test_retrain_promotes_model(self):
+        write_csv(self.csv, range(1, 8))
+        with mock.patch("analytics.management.commands.train_demand_model.RandomForestRegressor",
+                        lambda **kw: DummyRegressor()):  # keep the 5-fold CV + fit fast
+            steps = self.run_pipeline()
+        self.assertEqual(steps["retrain"].status, "succeeded", steps["retrain"].message)
+        self.assertIsNotNone(forecasts.active_model_path())
+        self.assertEqual(steps["retrain"].rows_out, 14 * 2 * 2 * 24)  # materialized forecasts
+
+    def test_failed_step_skips_downstream(self):
+        self.csv.unlink()
+        with self.assertRaises(CommandError):
+            self.run_pipeline()
+        steps = {s.name: s for s in PipelineJob.objects.first().steps.all()}
+        self.assertEqual(steps["ingest"].status, "failed")
+        self.assertIn("does not exist", steps["ingest"].message)
+        self.assertEqual({steps[name].status for name in ("rollup", "aggregate", "retrain")}, {"skipped"})
+        self.assertEqual(PipelineJob.objects.first().status, "failed")
+
+def exited_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+class JobsApiTests(TransactionTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.csv = Path(tmp.name) / "SeoulBikeData.csv"
+        write_csv(self.csv, [1])
+        override = override_settings(ANALYTICS_PIPELINE_CSV=str(self.csv))
+        override.enable()
+        self.addCleanup(override.disable)
+        self.admin = User.objects.create_user("ops", password="pw", is_staff=True)
+
+    def test_requires_staff(self):
+        self.assertIn(self.client.get("/api/v1/jobs").status_code, (401, 403))
+        self.client.force_login(User.objects.create_user("viewer", password="pw"))
+        self.assertEqual(self.client.post("/api/v1/jobs", {}, content_type="application/json").status_code, 403)
+
+    def test_trigger_runs_off_request_thread_and_reports_status(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.post("/api/v1/jobs", {"steps": ["nope"]},
+                                          content_type="application/json").status_code, 400)
+
+        ran_on = []
+        entered, release = threading.Event(), threading.Event()
+        real_run = pipeline.STEPS["aggregate"].run
+
+        def aggregate(params, out):
+            ran_on.append(threading.current_thread().name)
+            entered.set()
+            release.wait(10)
+            return real_run(params, out)
+
+        with mock.patch.object(pipeline.STEPS["aggregate"], "run", aggregate):
+            r = self.client.post("/api/v1/jobs", {"steps": ["aggregate"]}, content_type="application/json")
+            self.assertEqual(r.status_code, 202)
+            job_id = r.json()["id"]
+            entered.wait(10)   # the worker is idle inside aggregate, not mid-write
+            self.assertEqual(self.client.post("/api/v1/jobs", {}, content_type="application/json").status_code, 409)
+            release.set()
+            pipeline.wait(30)
+
+        self.assertTrue(ran_on[0].startswith("analytics-pipeline"))
+        self.assertNotEqual(ran_on[0], threading.current_thread().name)
+        body = self.client.get(f"/api/v1/jobs/{job_id}").json()
+        self.assertEqual((body["status"], body["triggered_by"]), ("succeeded", "ops"))
+        self.assertEqual([(s["name"], s["status"], s["rows_out"]) for s in body["steps"]],
+                         [("ingest", "succeeded", 24), ("rollup", "succeeded", 0), ("aggregate", "succeeded", 1)])
+        self.assertEqual(SeoulBikeHourly.objects.count(), 24)
+        self.assertEqual(self.client.get("/api/v1/jobs").json()[0]["id"], job_id)
+        self.assertEqual(self.client.get("/api/v1/jobs/999").status_code, 404)
+
+    def test_rejects_malformed_payloads(self):
+        self.client.force_login(self.admin)
+        for payload in ({"steps": [{}]}, {"steps": "ingest"}, {"force": "maybe"}):
+            r = self.client.post("/api/v1/jobs", payload, content_type="application/json")
+            self.assertEqual(r.status_code, 400, payload)
+        self.assertFalse(PipelineJob.objects.exists())
+
+        r = self.client.post("/api/v1/jobs", {"steps": ["ingest"], "force": "false"}, content_type="application/json")
+        self.assertEqual(r.status_code, 202)
+        pipeline.wait(30)
+        self.assertIs(PipelineJob.objects.get().params["force"], False)
+
+    def test_one_active_job_across_processes(self):
+        self.client.force_login(self.admin)
+        # a job claimed by another live process on this host blocks both entry points
+        other = PipelineJob.objects.create(status="running", worker=f"{socket.gethostname()}:{os.getppid()}")
+        r = self.client.post("/api/v1/jobs", {}, content_type="application/json")
+        self.assertEqual((r.status_code, r.json()["id"]), (409, other.pk))
+        with self.assertRaisesMessage(CommandError, f"Pipeline job {other.pk} is already running"):
+            call_command("run_pipeline", csv=str(self.csv), stdout=StringIO())
+        self.assertEqual(PipelineJob.objects.count(), 1)
+
+    def test_jobs_of_exited_workers_are_failed(self):
+        self.client.force_login(self.admin)
+        dead = PipelineJob.objects.create(status="running", worker=f"{socket.gethostname()}:{exited_pid()}")
+        dead.steps.create(name="ingest", status="running")
+        dead.steps.create(name="aggregate")
+        lost = PipelineJob.objects.create(status="queued", worker=pipeline.WORKER)  # e.g. restarted with same pid
+
+        body = self.client.get(f"/api/v1/jobs/{dead.pk}").json()
+        self.assertEqual(body["status"], "failed")
+        self.assertIn("exited before the job finished", body["error"])
+        self.assertEqual([s["status"] for s in body["steps"]], ["failed", "skipped"])
+        self.assertEqual(PipelineJob.objects.get(pk=lost.pk).status, "failed")
+
+        r = self.client.post("/api/v1/jobs", {"steps": ["ingest"]}, content_type="application/json")
+        self.assertEqual(r.status_code, 202)
+        pipeline.wait(30)
+        self.assertEqual(PipelineJob.objects.get(pk=r.json()["id"]).status, "succeeded")
@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from analytics import forecasts
+from analytics.models import SeoulBikeDailyAgg, SeoulBikeHourly
+from datetime import date, timedelta
+
+class QueryPlanTests(TestCase):
+    """Each endpoint's hourly query should be answered from a covering index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        d0 = date(2018, 1, 1)
+        SeoulBikeHourly.objects.bulk_create([
+            SeoulBikeHourly(
+                date=d0 + timedelta(days=d), hour=h, rented_bike_count=100 + h,
+                temperature_c=1.0, humidity_pct=50, windspeed_ms=1.0,
+                visibility_10m=2000, dew_point_c=-1.0, solar_radiation_mj_m2=0.0,
+                rainfall_mm=0.0, snowfall_cm=0.0, seasons="Winter",
+                holiday="No Holiday", functioning_day="Yes",
+            )
+            for d in range(3) for h in range(24)
+        ])
+        SeoulBikeDailyAgg.objects.bulk_create([
+            SeoulBikeDailyAgg(
+                date=d0 + timedelta(days=d), total_rides=2000 + d, avg_temp_c=1.0,
+                avg_humidity_pct=50.0, avg_windspeed_ms=1.0, seasons_mode="Winter",
+            )
+            for d in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def _plans(self, fn, table="analytics_seoulbikehourly"):
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+        plans = []
+        with connection.cursor() as cur:
+            for q in ctx.captured_queries:
+                if table not in q["sql"]:
+                    continue
+                cur.execute("EXPLAIN QUERY PLAN " + q["sql"])
+                plans.append(" | ".join(row[-1] for row in cur.fetchall()))
+        self.assertTrue(plans)
+        return plans
+
+    def assertCovered(self, plans, index=""):
+        for plan in plans:
+            self.assertIn(f"USING COVERING INDEX {index}", plan)
+
+    def test_kpis_basic_date_range(self):
+        plans = self._plans(lambda: self.client.get("/api/v1/kpis/basic?start=2018-01-02&end=2018-01-03"))
+        self.assertCovered(plans, "hourly_date_kpi_idx")
+
+    def test_kpis_basic_season(self):
+        plans = self._plans(lambda: self.client.get("/api/v1/kpis/basic?season=Winter&start=2018-01-02"))
+        self.assertCovered(plans, "hourly_season_date_kpi_idx")
+
+    def test_heatmap(self):
+        plans = self._plans(lambda: self.client.get("/api/v1/kpis/hourly-heatmap?season=Winter"))
+        self.assertCovered(plans, "hourly_season_hour_idx")
+        plans = self._plans(lambda: self.client.get("/api/v1/kpis/hourly-heatmap?start=2018-01-02"))
+        self.assertCovered(plans, "hourly_date_kpi_idx")
+
+    def test_date_bounds(self):
+        # MIN/MAX(date) is served by the (date, hour) unique index
+        plans = self._plans(lambda: self.client.get("/api/v1/meta/date-bounds"))
+        self.assertCovered(plans)
+
+    def test_hourly_list(self):
+        # ordered (date, hour) scan straight off the unique index, no sort step
+        plans = self._plans(lambda: self.client.get("/api/v1/hourly/"))
+        for plan in plans:
+            self.assertIn("USING INDEX analytics_seoulbikehourly_date_hour", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_daily_date_range(self):
+        plans = self._plans(lambda: self.client.get("/api/v1/daily/?start=2018-01-02&end=2018-01-03"),
+                            table="analytics_seoulbikedailyagg")
+        for plan in plans:
+            self.assertRegex(plan, r"SEARCH analytics_seoulbikedailyagg USING INDEX \w+ \(date>\? AND date<\?\)")
+
+    def test_rolling_date_range(self):
+        # the window itself sorts by day number; the date range must still be an index search
+        plans = self._plans(
+            lambda: self.client.get("/api/v1/kpis/rolling?metric=total_rides&window=7&start=2018-01-02&end=2018-01-03"),
+            table="analytics_seoulbikedailyagg",
+        )
+        for plan in plans:
+            self.assertRegex(plan, r"SEARCH analytics_seoulbikedailyagg USING INDEX \w+ \(date>\? AND date<\?\)")
+
+    def test_predict_day_seasonal_weather(self):
+        plans = self._plans(lambda: forecasts.seasonal_hourly_weather("Winter"))
+        self.assertCovered(plans, "hourly_season_hour_idx")
+
+    def test_connection_pragmas(self):
+        with connection.cursor() as cur:
+            cur.execute("PRAGMA synchronous")
+            self.assertEqual(cur.fetchone()[0], 1)   # NORMAL
+            cur.execute("PRAGMA cache_size")
+            self.assertLess(cur.fetchone()[0], 0)    # sized in KiB
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import TestCase
+from analytics.models import SeoulBikeDailyAgg
+from datetime import date, timedelta
+
+class RollingStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        d0 = date(2018, 1, 1)
+        for i in range(10):
+            SeoulBikeDailyAgg.objects.create(
+                date=d0 + timedelta(days=i), total_rides=(i + 1) * 10,
+                avg_temp_c=float(i), avg_humidity_pct=50.0, avg_windspeed_ms=1.0,
+                seasons_mode="Winter",
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rolling_matches_pandas_semantics(self):
+        r = self.client.get("/api/v1/kpis/rolling?metric=total_rides&window=3")
+        self.assertEqual(r.status_code, 200)
+        rows = r.json()["rows"]
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0]["n"], 1)
+        self.assertIsNone(rows[0]["std"])
+        self.assertEqual(rows[4]["sum"], 120.0)   # 30 + 40 + 50
+        self.assertEqual(rows[4]["mean"], 40.0)
+        self.assertEqual(rows[4]["std"], 10.0)
+
+    def test_start_keeps_full_history(self):
+        r = self.client.get("/api/v1/kpis/rolling?metric=avg_temp_c&window=4&start=2018-01-05")
+        rows = r.json()["rows"]
+        self.assertEqual(rows[0]["date"], "2018-01-05")
+        self.assertEqual(rows[0]["n"], 4)
+        self.assertEqual(rows[0]["mean"], 2.5)   # temps 1..4
+
+    def test_bad_metric(self):
+        r = self.client.get("/api/v1/kpis/rolling?metric=ingested_at")
+        self.assertEqual(r.status_code, 400)
+
+    def test_bad_dates(self):
+        for qs in ("start=2018-13-01", "end=2018-02-30", "start=yesterday"):
+            self.assertEqual(self.client.get(f"/api/v1/kpis/rolling?{qs}").status_code, 400, qs)
+
+    def test_window_is_calendar_days_across_gaps(self):
+        # next row after a 30-day gap: a 3-day window must not reach back into January
+        SeoulBikeDailyAgg.objects.create(
+            date=date(2018, 2, 9), total_rides=1000, avg_temp_c=0.0, avg_humidity_pct=50.0,
+            avg_windspeed_ms=1.0, seasons_mode="Winter",
+        )
+        rows = self.client.get("/api/v1/kpis/rolling?metric=total_rides&window=3").json()["rows"]
+        self.assertEqual((rows[-1]["date"], rows[-1]["n"], rows[-1]["sum"]), ("2018-02-09", 1, 1000.0))
+
+        rows = self.client.get("/api/v1/kpis/rolling?metric=total_rides&window=3&start=2018-02-09").json()["rows"]
+        self.assertEqual([(r["date"], r["n"]) for r in rows], [("2018-02-09", 1)])
@@ -0,0 +1,122 @@
+from django.core.cache import cache
+from django.test import TestCase
+from analytics import stations
+from analytics.engine import ColumnarEngine
+from analytics.models import SeoulBikeHourly, Station, DistrictHourlyAgg, StationDailyAgg
+from analytics.views import _demand_share
+from datetime import date
+import pandas as pd
+
+class StationRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for d in [date(2018, 1, 31), date(2018, 2, 1)]:   # Wed, Thu; spans two partitions
+            for h in range(2):
+                SeoulBikeHourly.objects.create(
+                    date=d, hour=h, rented_bike_count=0,
+                    temperature_c=1.0, humidity_pct=50, windspeed_ms=1.0,
+                    visibility_10m=2000, dew_point_c=-1.0, solar_radiation_mj_m2=0.0,
+                    rainfall_mm=0.0, snowfall_cm=0.0, seasons="Winter",
+                    holiday="No Holiday", functioning_day="Yes"
+                )
+        Station.objects.create(station_id="101", district="Mapo-gu")
+        Station.objects.create(station_id="102", district="Mapo-gu")
+        Station.objects.create(station_id="201", district="Jung-gu")
+
+    def setUp(self):
+        cache.clear()
+        facts = pd.DataFrame(
+            [(sid, d, h, n) for d in [date(2018, 1, 31), date(2018, 2, 1)] for h in range(2)
+             for sid, n in [("101", 10 + h), ("102", 5), ("201", 1)]],
+            columns=["station_id", "date", "hour", "rented_bike_count"],
+        )
+        stations.rebuild_rollups(stations.write_facts(facts))
+
+    def test_partitions_and_city_rollup(self):
+        self.assertEqual(stations.partitions(), [(2018, 1), (2018, 2)])
+        self.assertEqual(stations.partitions_between(date(2018, 2, 1), None), [(2018, 2)])
+        city = SeoulBikeHourly.objects.get(date=date(2018, 2, 1), hour=1)
+        self.assertEqual(city.rented_bike_count, 11 + 5 + 1)
+        self.assertEqual(DistrictHourlyAgg.objects.get(district="Mapo-gu", date=date(2018, 1, 31), hour=0).rented_bike_count, 15)
+        daily = StationDailyAgg.objects.get(station_id="101", date=date(2018, 1, 31))
+        self.assertEqual((daily.total_rides, daily.hours, daily.seasons), (21, 2, "Winter"))
+
+    def test_kpis_by_district_and_station(self):
+        r = self.client.get("/api/v1/kpis/basic?district=Mapo-gu&start=2018-02-01").json()
+        self.assertEqual((r["rows"], r["total_rides"]), (2, 31))
+        r = self.client.get("/api/v1/kpis/basic?station=201&season=Winter").json()
+        self.assertEqual((r["rows"], r["total_rides"], r["avg_rides_per_hour"]), (4, 4, 1.0))
+
+    def test_heatmap_by_station_and_district(self):
+        m = self.client.get("/api/v1/kpis/hourly-heatmap?station=101&end=2018-01-31").json()["matrix"]
+        self.assertEqual(m[3][:2], [10.0, 11.0])   # Wednesday
+        self.assertEqual(sum(map(sum, m)), 21.0)
+        m = self.client.get("/api/v1/kpis/hourly-heatmap?district=Jung-gu").json()["matrix"]
+        self.assertEqual(m[4][:2], [1.0, 1.0])     # Thursday
+
+    def test_ingest_command(self):
+        import tempfile
+        from io import StringIO
+        from pathlib import Path
+        from django.core.management import call_command
+        with tempfile.TemporaryDirectory() as tmp:
+            st = Path(tmp) / "stations.csv"
+            st.write_text("station_id,name,district,latitude,longitude\n301,Hapjeong,Mapo-gu,37.55,126.91\n")
+            facts = Path(tmp) / "hourly.csv"
+            facts.write_text("station_id,date,hour,rented_bike_count\n301,2018-02-01,0,100\n")
+            call_command("ingest_station_data", stations=str(st), hourly=str(facts), stdout=StringIO())
+        self.assertEqual(Station.objects.get(station_id="301").district, "Mapo-gu")
+        self.assertEqual(SeoulBikeHourly.objects.get(date=date(2018, 2, 1), hour=0).rented_bike_count, 10 + 5 + 1 + 100)
+
+    def test_unknown_station_facts_rejected(self):
+        facts = pd.DataFrame([("999", date(2018, 2, 1), 0, 500), ("101", date(2018, 2, 1), 0, 20)],
+                             columns=["station_id", "date", "hour", "rented_bike_count"])
+        with self.assertLogs("analytics.stations", "WARNING") as logs:
+            stations.rebuild_rollups(stations.write_facts(facts))
+        self.assertIn("1 station-hourly rows for 1 unknown station(s): 999", logs.output[0])
+        self.assertEqual(SeoulBikeHourly.objects.get(date=date(2018, 2, 1), hour=0).rented_bike_count, 20 + 5 + 1)
+        self.assertEqual(len(stations.station_hourly("999")), 0)
+
+    def test_partial_month_coverage_is_reported(self):
+        SeoulBikeHourly.objects.create(
+            date=date(2018, 2, 3), hour=0, rented_bike_count=900,
+            temperature_c=1.0, humidity_pct=50, windspeed_ms=1.0,
+            visibility_10m=2000, dew_point_c=-1.0, solar_radiation_mj_m2=0.0,
+            rainfall_mm=0.0, snowfall_cm=0.0, seasons="Winter",
+            holiday="No Holiday", functioning_day="Yes"
+        )
+        facts = pd.DataFrame([("101", date(2018, 2, 2), h, 3) for h in range(3)],
+                             columns=["station_id", "date", "hour", "rented_bike_count"])
+        with self.assertLogs("analytics.stations", "WARNING") as logs:
+            coverage = stations.rebuild_rollups(stations.write_facts(facts))
+        self.assertEqual(coverage, {(2018, 2): (3, 1)})
+        self.assertIn("2018-02: 3 station-fact hour(s) have no city row", logs.output[0])
+        self.assertIn("2018-02: 1 city hour(s) have no station facts", logs.output[1])
+        self.assertFalse(SeoulBikeHourly.objects.filter(date=date(2018, 2, 2)).exists())
+        self.assertEqual(SeoulBikeHourly.objects.get(date=date(2018, 2, 3)).rented_bike_count, 900)
+
+        with self.assertNoLogs("analytics.stations", "WARNING"):
+            self.assertEqual(stations.rebuild_rollups([(2018, 1)]), {(2018, 1): (0, 0)})
+
+    def test_columnar_engine_sees_rollup(self):
+        url = "/api/v1/kpis/basic?engine=columnar&start=2018-02-01&end=2018-02-01"
+        self.assertEqual(self.client.get(url).json()["total_rides"], 33)
+        version = ColumnarEngine.data_version()
+        facts = pd.DataFrame([("201", date(2018, 2, 1), 0, 100)],
+                             columns=["station_id", "date", "hour", "rented_bike_count"])
+        stations.rebuild_rollups(stations.write_facts(facts))
+        self.assertNotEqual(ColumnarEngine.data_version(), version)   # visible to other processes too
+        cache.clear()
+        self.assertEqual(self.client.get(url).json()["total_rides"], 33 - 1 + 100)
+
+    def test_demand_share_only_over_covered_dates(self):
+        # a season date with no station facts must not dilute the share
+        SeoulBikeHourly.objects.create(
+            date=date(2018, 1, 15), hour=0, rented_bike_count=1000,
+            temperature_c=1.0, humidity_pct=50, windspeed_ms=1.0,
+            visibility_10m=2000, dew_point_c=-1.0, solar_radiation_mj_m2=0.0,
+            rainfall_mm=0.0, snowfall_cm=0.0, seasons="Winter",
+            holiday="No Holiday", functioning_day="Yes"
+        )
+        self.assertAlmostEqual(_demand_share("station", "201", "Winter")[0], 4 / 66)
+        self.assertAlmostEqual(_demand_share("district", "Jung-gu", "Winter")[0], 2 / 32)
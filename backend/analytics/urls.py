@@ -6,6 +6,10 @@ from .views import (
     meta_date_bounds,
     kpis_basic,
     kpis_hourly_heatmap,
+    kpis_rolling,
+    metrics_view,
+    jobs,
+    job_detail,
     predict_hour,
     predict_day,
 )
@@ -19,6 +23,10 @@ urlpatterns = [
     path("meta/date-bounds", meta_date_bounds),
     path("kpis/basic", kpis_basic),
     path("kpis/hourly-heatmap", kpis_hourly_heatmap),
+    path("kpis/rolling", kpis_rolling),
+    path("metrics", metrics_view),
+    path("jobs", jobs),
+    path("jobs/<int:job_id>", job_detail),
     path("predict/hour", predict_hour),
     path("predict/day", predict_day),
 ]
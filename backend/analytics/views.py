@@ -1,19 +1,26 @@
-from rest_framework import viewsets
-from rest_framework.decorators import api_view
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
 from django.utils.dateparse import parse_date
-from django.db.models import Avg, Sum, Min, Max
+from django.db.models import Avg, Count, Sum, Min, Max
 from django.db.models.functions import ExtractWeekDay
+from django.core.cache import cache
 from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
+from django.http import HttpResponse
 
 import calendar
-from pathlib import Path
-from joblib import load
+import math
+from datetime import date, timedelta
 
-from .models import SeoulBikeHourly, SeoulBikeDailyAgg
-from .serializers import SeoulBikeHourlySerializer, SeoulBikeDailyAggSerializer
+from . import forecasts, metrics, pipeline, stations
+from .engine import engine, use_columnar
+from .models import (
+    SeoulBikeHourly, SeoulBikeDailyAgg, DistrictHourlyAgg, StationDailyAgg, PipelineJob, ROLLING_METRICS,
+)
+from .serializers import PipelineJobSerializer, SeoulBikeHourlySerializer, SeoulBikeDailyAggSerializer
 
 
 # -----------------------
@@ -32,18 +39,84 @@ def _apply_filters(request, qs):
     return qs
 
 
-_model_cache = {"model": None}
-def _get_model():
-    if _model_cache["model"] is None:
-        base = Path(__file__).resolve().parents[2] / "models_store"
-        for name in ["model_v2.joblib", "model_v1.joblib"]:
-            p = base / name
-            if p.exists():
-                _model_cache["model"] = load(p)
-                break
-        if _model_cache["model"] is None:
-            raise RuntimeError("No trained model found in models_store/")
-    return _model_cache["model"]
+def _station_scope(params):
+    """("station", id) or ("district", name) from ?station= / ?district=, else None."""
+    if params.get("station"):
+        return "station", str(params["station"])
+    if params.get("district"):
+        return "district", str(params["district"])
+    return None
+
+
+def _demand_share(kind, value, season):
+    """
+    Per-hour fraction of city-wide rides in `season` attributable to a district
+    (from DistrictHourlyAgg) or a station (flat, from StationDailyAgg). City rides are
+    summed only over the dates the district/station has rollup rows for, so partial
+    station coverage of a season doesn't dilute the share.
+    """
+    if kind == "district":
+        rows = DistrictHourlyAgg.objects.filter(district=value, seasons=season)
+    else:
+        rows = StationDailyAgg.objects.filter(station_id=value, seasons=season)
+    city = (SeoulBikeHourly.objects.filter(seasons=season, date__in=rows.values("date"))
+            .values("hour").annotate(v=Sum("rented_bike_count")))
+    city = {r["hour"]: r["v"] or 0 for r in city}
+    if kind == "district":
+        part = {r["hour"]: r["v"] or 0 for r in rows.values("hour").annotate(v=Sum("rented_bike_count"))}
+        return [part.get(h, 0) / city[h] if city.get(h) else 0.0 for h in range(24)]
+    total = rows.aggregate(v=Sum("total_rides"))["v"]
+    city_total = sum(city.values())
+    return [(total or 0) / city_total if city_total else 0.0] * 24
+
+
+def _parse_payload_date(value):
+    try:
+        return parse_date(str(value))
+    except ValueError:
+        return None
+
+
+ROLLING_CACHE_SECONDS = 60
+ROLLING_MAX_WINDOW = 366
+
+def _rolling_stats(metric, window, start=None, end=None, season=None):
+    """
+    Trailing rolling sum/mean/std of a daily metric for any window, one indexed query
+    on SeoulBikeDailyAgg.date. Cached per (metric, window, filters).
+    """
+    key = f"rolling:{metric}:{window}:{start}:{end}:{season}"
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+
+    qs = SeoulBikeDailyAgg.objects.all()
+    if season:
+        qs = qs.filter(seasons_mode=season)
+    if start:
+        # pull window-1 extra calendar days so the first rows in range have full history
+        qs = qs.filter(date__gte=start - timedelta(days=window - 1))
+    if end:
+        qs = qs.filter(date__lte=end)
+
+    out = []
+    for r in qs.rolling(metric, window).values("date", "roll_n", "roll_sum", "roll_mean", "roll_sumsq"):
+        if start and r["date"] < start:
+            continue
+        n = r["roll_n"]
+        std = None
+        if n > 1:
+            var = (r["roll_sumsq"] - r["roll_sum"] ** 2 / n) / (n - 1)
+            std = round(math.sqrt(max(var, 0.0)), 2)
+        out.append({
+            "date": r["date"],
+            "n": n,
+            "sum": round(float(r["roll_sum"]), 2),
+            "mean": round(float(r["roll_mean"]), 2),
+            "std": std,
+        })
+    cache.set(key, out, ROLLING_CACHE_SECONDS)
+    return out
 
 
 # -----------------------
@@ -74,29 +147,95 @@ def meta_date_bounds(request):
 @api_view(["GET"])
 @cache_page(60)
 def kpis_basic(request):
+    scope = _station_scope(request.GET)
+    if scope:
+        return Response(_station_kpis(request, *scope))
+
+    if use_columnar(request, "kpis_basic"):
+        cols = engine.refresh()
+        return Response(cols.kpis_basic(cols.mask_from_request(request)))
+
     qs = _apply_filters(request, SeoulBikeHourly.objects.all())
+    # single pass over the covering index instead of one query per KPI
+    agg = qs.aggregate(
+        rows=Count("id"),
+        total_rides=Sum("rented_bike_count"),
+        avg_temp_c=Avg("temperature_c"),
+        avg_humidity_pct=Avg("humidity_pct"),
+        avg_rides_per_hour=Avg("rented_bike_count"),
+    )
     out = {
-        "rows": qs.count(),
-        "total_rides": qs.aggregate(v=Sum("rented_bike_count"))["v"] or 0,
-        "avg_temp_c": round(qs.aggregate(v=Avg("temperature_c"))["v"] or 0, 2),
-        "avg_humidity_pct": round(qs.aggregate(v=Avg("humidity_pct"))["v"] or 0, 2),
-        "avg_rides_per_hour": round(qs.aggregate(v=Avg("rented_bike_count"))["v"] or 0, 2),
+        "rows": agg["rows"],
+        "total_rides": agg["total_rides"] or 0,
+        "avg_temp_c": round(agg["avg_temp_c"] or 0, 2),
+        "avg_humidity_pct": round(agg["avg_humidity_pct"] or 0, 2),
+        "avg_rides_per_hour": round(agg["avg_rides_per_hour"] or 0, 2),
     }
     return Response(out)
 
+def _station_kpis(request, kind, value):
+    """kpis_basic for a district (DistrictHourlyAgg) or station (StationDailyAgg); weather is city-wide."""
+    weather = _apply_filters(request, SeoulBikeHourly.objects.all()).aggregate(
+        avg_temp_c=Avg("temperature_c"), avg_humidity_pct=Avg("humidity_pct"),
+    )
+    if kind == "district":
+        qs = _apply_filters(request, DistrictHourlyAgg.objects.filter(district=value))
+        agg = qs.aggregate(rows=Count("id"), total_rides=Sum("rented_bike_count"))
+    else:
+        qs = _apply_filters(request, StationDailyAgg.objects.filter(station_id=value))
+        agg = qs.aggregate(rows=Sum("hours"), total_rides=Sum("total_rides"))
+    rows = agg["rows"] or 0
+    total = agg["total_rides"] or 0
+    return {
+        kind: value,
+        "rows": rows,
+        "total_rides": total,
+        "avg_temp_c": round(weather["avg_temp_c"] or 0, 2),
+        "avg_humidity_pct": round(weather["avg_humidity_pct"] or 0, 2),
+        "avg_rides_per_hour": round(total / rows, 2) if rows else 0,
+    }
+
+def _station_heatmap(request, station_id):
+    """7x24 mean rides for one station, read from its monthly fact partitions."""
+    start = request.GET.get("start")
+    end = request.GET.get("end")
+    rows = stations.station_hourly(
+        station_id,
+        start=parse_date(start) if start else None,
+        end=parse_date(end) if end else None,
+        season=request.GET.get("season"),
+    )
+    sums = [[0.0] * 24 for _ in range(7)]
+    counts = [[0] * 24 for _ in range(7)]
+    for d, hr, rides in rows:
+        wd = (date.fromisoformat(str(d)).weekday() + 1) % 7  # Sun..Sat like ExtractWeekDay
+        sums[wd][hr] += rides
+        counts[wd][hr] += 1
+    return [[round(sums[w][h] / counts[w][h], 2) if counts[w][h] else 0.0 for h in range(24)] for w in range(7)]
+
 @api_view(["GET"])
 @cache_page(60)
 def kpis_hourly_heatmap(request):
-    qs = _apply_filters(request, SeoulBikeHourly.objects.all())
-    qs = qs.annotate(weekday=ExtractWeekDay("date"))  # 1..7 (Sun..Sat)
-    rows = qs.values("weekday", "hour").annotate(avg_rides=Avg("rented_bike_count"))
+    scope = _station_scope(request.GET)
+    if scope and scope[0] == "station":
+        matrix = _station_heatmap(request, scope[1])
+    elif not scope and use_columnar(request, "kpis_hourly_heatmap"):
+        cols = engine.refresh()
+        matrix = cols.hourly_heatmap(cols.mask_from_request(request))
+    else:
+        if scope:
+            qs = _apply_filters(request, DistrictHourlyAgg.objects.filter(district=scope[1]))
+        else:
+            qs = _apply_filters(request, SeoulBikeHourly.objects.all())
+        qs = qs.annotate(weekday=ExtractWeekDay("date"))  # 1..7 (Sun..Sat)
+        rows = qs.values("weekday", "hour").annotate(avg_rides=Avg("rented_bike_count"))
 
-    # Build 7x24 matrix (Sun..Sat x 0..23)
-    matrix = [[0.0 for _ in range(24)] for _ in range(7)]
-    for r in rows:
-        wd = int(r["weekday"]) - 1
-        hr = int(r["hour"])
-        matrix[wd][hr] = round(r["avg_rides"] or 0.0, 2)
+        # Build 7x24 matrix (Sun..Sat x 0..23)
+        matrix = [[0.0 for _ in range(24)] for _ in range(7)]
+        for r in rows:
+            wd = int(r["weekday"]) - 1
+            hr = int(r["hour"])
+            matrix[wd][hr] = round(r["avg_rides"] or 0.0, 2)
 
     return Response({
         "matrix": matrix,
@@ -104,6 +243,37 @@ def kpis_hourly_heatmap(request):
         "hours": list(range(24))
     })
 
+@api_view(["GET"])
+def kpis_rolling(request):
+    """
+    GET ?metric=total_rides&window=14[&start=&end=&season=]
+    Returns: { "metric":..., "window":..., "rows":[{date, n, sum, mean, std}, ...] }
+    """
+    metric = request.GET.get("metric", "total_rides")
+    if metric not in ROLLING_METRICS:
+        return Response({"error": f"metric must be one of {list(ROLLING_METRICS)}"}, status=400)
+    try:
+        window = int(request.GET.get("window", 7))
+    except ValueError:
+        return Response({"error": "window must be an integer"}, status=400)
+    if not 1 <= window <= ROLLING_MAX_WINDOW:
+        return Response({"error": f"window must be between 1 and {ROLLING_MAX_WINDOW}"}, status=400)
+
+    bounds = {}
+    for name in ("start", "end"):
+        raw = request.GET.get(name)
+        bounds[name] = _parse_payload_date(raw) if raw else None
+        if raw and bounds[name] is None:
+            return Response({"error": f"{name} must be a valid YYYY-MM-DD date"}, status=400)
+    start, end = bounds["start"], bounds["end"]
+    rows = _rolling_stats(metric, window, start, end, request.GET.get("season"))
+    metrics.rows_serialized(len(rows))
+    return Response({"metric": metric, "window": window, "rows": rows})
+
+def metrics_view(request):
+    """Prometheus text exposition of analytics.metrics for this process."""
+    return HttpResponse(metrics.registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
 
 # -----------------------
 # Prediction Endpoints
@@ -118,6 +288,7 @@ def predict_hour(request):
       "dew_point_c":-5.0, "solar_radiation_mj_m2":0.0, "rainfall_mm":0.0, "snowfall_cm":0.0,
       "seasons":"Winter", "holiday":"No Holiday", "functioning_day":"Yes"
     }
+    Optional "station" or "district" scales the city prediction by that share of seasonal demand.
     """
     payload = request.data
     required = ["date","hour","temperature_c","humidity_pct","windspeed_ms","visibility_10m",
@@ -127,114 +298,116 @@ def predict_hour(request):
     if missing:
         return Response({"error": f"Missing fields: {missing}"}, status=400)
 
-    import pandas as pd
-    weekday = pd.to_datetime(payload["date"]).weekday()
-    month = pd.to_datetime(payload["date"]).month
-
-    row = {
-        "hour": int(payload["hour"]),
-        "temperature_c": float(payload["temperature_c"]),
-        "humidity_pct": float(payload["humidity_pct"]),
-        "windspeed_ms": float(payload["windspeed_ms"]),
-        "visibility_10m": float(payload["visibility_10m"]),
-        "dew_point_c": float(payload["dew_point_c"]),
-        "solar_radiation_mj_m2": float(payload["solar_radiation_mj_m2"]),
-        "rainfall_mm": float(payload["rainfall_mm"]),
-        "snowfall_cm": float(payload["snowfall_cm"]),
-        "weekday": int(weekday),
-        "month": int(month),
-        "seasons": str(payload["seasons"]),
-        "holiday": str(payload["holiday"]),
-        "functioning_day": str(payload["functioning_day"]),
-        # v2 model also uses cyclic & lag/rolling internally via pipeline preprocessing
-        "hour_sin": 0.0, "hour_cos": 0.0, "month_sin": 0.0, "month_cos": 0.0,
-        "lag_1": 0.0, "lag_24": 0.0, "roll3_same_hour": 0.0, "roll7_same_hour": 0.0,
-        "delta_temperature_c_24h": 0.0, "delta_humidity_pct_24h": 0.0, "delta_windspeed_ms_24h": 0.0,
-        "delta_visibility_10m_24h": 0.0, "delta_dew_point_c_24h": 0.0, "delta_solar_radiation_mj_m2_24h": 0.0,
-        "delta_rainfall_mm_24h": 0.0, "delta_snowfall_cm_24h": 0.0,
-        "rain_flag": 1 if float(payload["rainfall_mm"]) > 0 else 0,
-        "snow_flag": 1 if float(payload["snowfall_cm"]) > 0 else 0,
-    }
+    day = _parse_payload_date(payload["date"])
+    if day is None:
+        return Response({"error": "date must be YYYY-MM-DD"}, status=400)
 
-    import pandas as pd
-    X = pd.DataFrame([row])
-    model = _get_model()
-    yhat = float(model.predict(X)[0])
-    return Response({"predicted_rented_bike_count": round(yhat, 2)})
-
-
-from django.db.models import Avg  # for seasonal hourly medians/means
-def _seasonal_hourly_weather(season: str):
-    agg = SeoulBikeHourly.objects.filter(seasons=season).values("hour").annotate(
-        temperature_c=Avg("temperature_c"),
-        humidity_pct=Avg("humidity_pct"),
-        windspeed_ms=Avg("windspeed_ms"),
-        visibility_10m=Avg("visibility_10m"),
-        dew_point_c=Avg("dew_point_c"),
-        solar_radiation_mj_m2=Avg("solar_radiation_mj_m2"),
-        rainfall_mm=Avg("rainfall_mm"),
-        snowfall_cm=Avg("snowfall_cm"),
+    row = forecasts.feature_row(
+        payload["hour"], payload, day.weekday(), day.month,
+        payload["seasons"], payload["holiday"], payload["functioning_day"],
     )
-    return {a["hour"]: a for a in agg}
+    model = forecasts.get_model()
+    with metrics.timer("predict"):
+        yhat = float(forecasts.predict(model, [row])[0])
+
+    out = {}
+    scope = _station_scope(payload)
+    if scope:
+        yhat *= _demand_share(*scope, str(payload["seasons"]))[int(payload["hour"]) % 24]
+        out[scope[0]] = scope[1]
+    out["predicted_rented_bike_count"] = round(yhat, 2)
+    return Response(out)
 
 @api_view(["POST"])
 def predict_day(request):
     """
     JSON: { "date":"2018-01-15", "seasons":"Winter", "holiday":"No Holiday", "functioning_day":"Yes" }
-    Returns: { "date":..., "hours":[0..23], "pred":[...] }
+    Optional "station" or "district" scales the city forecast by that share of seasonal demand.
+    Returns: { "date":..., "hours":[0..23], "pred":[...], "source":"materialized"|"live" }
     """
     payload = request.data
     for k in ["date","seasons","holiday","functioning_day"]:
         if k not in payload:
             return Response({"error": f"Missing field {k}"}, status=400)
 
-    import pandas as pd
-    day = pd.to_datetime(payload["date"])
+    day = _parse_payload_date(payload["date"])
+    if day is None:
+        return Response({"error": "date must be YYYY-MM-DD"}, status=400)
     season = str(payload["seasons"])
     holiday = str(payload["holiday"])
     fday = str(payload["functioning_day"])
-    weekday = int(day.weekday())
-    month = int(day.month)
-
-    weather = _seasonal_hourly_weather(season)
-    if not weather:
-        return Response({"error": "No weather stats for given season"}, status=400)
-
-    rows = []
-    for h in range(24):
-        w = weather.get(h, {})
-        rows.append({
-            "hour": h,
-            "temperature_c": float(w.get("temperature_c", 0.0)),
-            "humidity_pct": float(w.get("humidity_pct", 0.0)),
-            "windspeed_ms": float(w.get("windspeed_ms", 0.0)),
-            "visibility_10m": float(w.get("visibility_10m", 0.0)),
-            "dew_point_c": float(w.get("dew_point_c", 0.0)),
-            "solar_radiation_mj_m2": float(w.get("solar_radiation_mj_m2", 0.0)),
-            "rainfall_mm": float(w.get("rainfall_mm", 0.0)),
-            "snowfall_cm": float(w.get("snowfall_cm", 0.0)),
-            "weekday": weekday,
-            "month": month,
-            "seasons": season,
-            "holiday": holiday,
-            "functioning_day": fday,
-            # engineered inputs default 0 for inference
-            "hour_sin": 0.0, "hour_cos": 0.0, "month_sin": 0.0, "month_cos": 0.0,
-            "lag_1": 0.0, "lag_24": 0.0, "roll3_same_hour": 0.0, "roll7_same_hour": 0.0,
-            "delta_temperature_c_24h": 0.0, "delta_humidity_pct_24h": 0.0, "delta_windspeed_ms_24h": 0.0,
-            "delta_visibility_10m_24h": 0.0, "delta_dew_point_c_24h": 0.0, "delta_solar_radiation_mj_m2_24h": 0.0,
-            "delta_rainfall_mm_24h": 0.0, "delta_snowfall_cm_24h": 0.0,
-            "rain_flag": 1 if float(w.get("rainfall_mm", 0.0)) > 0 else 0,
-            "snow_flag": 1 if float(w.get("snowfall_cm", 0.0)) > 0 else 0,
-        })
+    weekday = day.weekday()
+    month = day.month
 
-    import pandas as pd
-    X = pd.DataFrame(rows)
-    model = _get_model()
-    yhat = model.predict(X)
+    # serve the materialized forecast when the promoted model already produced it
+    yhat = forecasts.lookup(day, season, holiday, fday)
+    source = "materialized"
+    if yhat is None:
+        source = "live"
+        if use_columnar(request, "predict_day"):
+            weather = engine.refresh().seasonal_hourly_weather(season)
+        else:
+            weather = forecasts.seasonal_hourly_weather(season)
+        if not weather:
+            return Response({"error": "No weather stats for given season"}, status=400)
 
-    return Response({
-        "date": str(day.date()),
+        rows = [
+            forecasts.feature_row(h, weather.get(h, {}), weekday, month, season, holiday, fday)
+            for h in range(24)
+        ]
+
+        model = forecasts.get_model()
+        with metrics.timer("predict"):
+            yhat = forecasts.predict(model, rows)
+
+    out = {
+        "date": str(day),
         "hours": list(range(24)),
-        "pred": [round(float(v), 2) for v in yhat]
-    })
+        "pred": [round(float(v), 2) for v in yhat],
+        "source": source,
+    }
+    scope = _station_scope(payload)
+    if scope:
+        share = _demand_share(*scope, season)
+        out["pred"] = [round(float(v) * share[h], 2) for h, v in enumerate(yhat)]
+        out[scope[0]] = scope[1]
+    return Response(out)
+
+
+# -----------------------
+# Pipeline jobs
+# -----------------------
+@api_view(["GET", "POST"])
+@permission_classes([IsAdminUser])
+def jobs(request):
+    """
+    GET: recent pipeline jobs. POST {"steps": [...], "force": bool}: queue a run on the
+    background worker and return 202 immediately (409 with the active job if one is running).
+    The ingest step always reads ANALYTICS_PIPELINE_CSV; paths aren't taken from requests.
+    """
+    if request.method == "GET":
+        pipeline.fail_stale_jobs()  # so polling doesn't report a dead worker's job as running
+        qs = PipelineJob.objects.prefetch_related("steps")[:20]
+        return Response(PipelineJobSerializer(qs, many=True).data)
+
+    steps = request.data.get("steps") or None
+    if steps is not None and (
+        not isinstance(steps, list) or any(not isinstance(s, str) or s not in pipeline.STEPS for s in steps)
+    ):
+        return Response({"error": f"steps must be a list drawn from {list(pipeline.STEPS)}"}, status=400)
+    try:
+        # true/false, 1/0 and their string forms; "false" must not mean force
+        force = serializers.BooleanField().to_internal_value(request.data.get("force", False))
+    except serializers.ValidationError:
+        return Response({"error": "force must be a boolean"}, status=400)
+    job, started = pipeline.start(steps, force=force, triggered_by=request.user.get_username())
+    return Response(PipelineJobSerializer(job).data, status=202 if started else 409)
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def job_detail(request, job_id):
+    pipeline.fail_stale_jobs()
+    job = PipelineJob.objects.prefetch_related("steps").filter(pk=job_id).first()
+    if job is None:
+        return Response({"error": "job not found"}, status=404)
+    return Response(PipelineJobSerializer(job).data)
@@ -30,7 +30,7 @@ ALLOWED_HOSTS = ["*"] # fine for local dev
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "BACKEND": "analytics.metrics.MetricsLocMemCache",  # LocMemCache + hit/miss counters
         "LOCATION": "sobike-cache",
     }
 }
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "analytics.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -85,13 +86,53 @@ WSGI_APPLICATION = "core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite storage profile: WAL so readers don't block on ingest writes, memory-mapped
+# reads, a 64 MiB page cache and NORMAL fsync (safe under WAL). Connections persist
+# across requests so the PRAGMAs run once per worker connection, not per request.
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+    f"PRAGMA cache_size=-{int(os.environ.get('SQLITE_CACHE_KIB', 64 * 1024))}",
+    "PRAGMA temp_store=MEMORY",
+]
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 600)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": ";".join(SQLITE_PRAGMAS),
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
     }
 }
 
+# Endpoints answered by the in-memory columnar engine (analytics/engine.py) instead of
+# the ORM, e.g. "kpis_basic,kpis_hourly_heatmap,predict_day". ?engine=orm|columnar
+# overrides per request so both paths can be compared.
+ANALYTICS_COLUMNAR_ENDPOINTS = [
+    e.strip() for e in os.environ.get("ANALYTICS_COLUMNAR_ENDPOINTS", "").split(",") if e.strip()
+]
+
+# Load joblib/sklearn and the served model in AnalyticsConfig.ready() so the first
+# prediction doesn't pay for them, and preload the columnar engine when any endpoint
+# uses it. Off by default to keep manage.py commands fast.
+ANALYTICS_WARMUP = os.environ.get("ANALYTICS_WARMUP", "").lower() in ("1", "true", "yes")
+
+# Source CSV for the ingest step of `run_pipeline` / POST /api/v1/jobs (see analytics.pipeline).
+ANALYTICS_PIPELINE_CSV = os.environ.get(
+    "ANALYTICS_PIPELINE_CSV", str(BASE_DIR.parent / "data" / "SeoulBikeData.csv")
+)
+
+# Sampled cProfile dumps for requests sent with `X-Profile: 1` (see analytics.middleware).
+# Disabled unless ANALYTICS_PROFILE_DIR is set.
+ANALYTICS_PROFILE_DIR = os.environ.get("ANALYTICS_PROFILE_DIR") or None
+ANALYTICS_PROFILE_SAMPLE_RATE = float(os.environ.get("ANALYTICS_PROFILE_SAMPLE_RATE", 1.0))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators